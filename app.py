@@ -3,7 +3,6 @@ Research Paper Analyzer - Streamlit UI
 Interactive interface for agentic research paper analysis
 """
 import streamlit as st
-from src.agent.orchestrator import ResearchAgent
 import time
 
 
@@ -14,11 +13,21 @@ st.set_page_config(
     layout="wide"
 )
 
-# Initialize session state
+# Initialize session state; the agent is created on first use so the page renders first
 if 'agent' not in st.session_state:
-    st.session_state.agent = ResearchAgent()
+    st.session_state.agent = None
 if 'results' not in st.session_state:
     st.session_state.results = None
+if 'follow_ups' not in st.session_state:
+    st.session_state.follow_ups = []
+
+
+def get_agent():
+    """Return the session's agent, creating it on first use"""
+    if st.session_state.agent is None:
+        from src.agent.orchestrator import ResearchAgent
+        st.session_state.agent = ResearchAgent()
+    return st.session_state.agent
 
 
 def main():
@@ -32,7 +41,7 @@ def main():
     # Sidebar
     with st.sidebar:
         st.header("⚙️ Settings")
-        max_papers = st.slider("Maximum Papers", 1, 10, 5)
+        max_papers = st.slider("Maximum Papers", 1, 25, 5)
         
         st.markdown("---")
         st.markdown("### About")
@@ -67,16 +76,13 @@ def main():
             status_text = st.empty()
             
             # Run analysis with progress updates
-            status_text.text("🧠 Decomposing query...")
+            status_text.text("🧠 Decomposing query and searching ArXiv...")
             progress_bar.progress(10)
-            time.sleep(0.5)
-            
-            status_text.text("🔍 Searching ArXiv...")
-            progress_bar.progress(30)
             
             # Run full analysis
-            results = st.session_state.agent.run_full_analysis(query, max_papers)
+            results = get_agent().run_full_analysis(query, max_papers)
             st.session_state.results = results
+            st.session_state.follow_ups = []
             
             progress_bar.progress(100)
             status_text.text("✅ Analysis complete!")
@@ -107,14 +113,28 @@ def main():
             st.markdown(f"**Found {len(papers)} papers:**")
             
             for i, paper in enumerate(papers, 1):
-                metadata = paper.get("arxiv_metadata", {})
                 st.markdown(f"""
-                **[Paper {i}] {metadata.get('title', 'Unknown')}**
-                - Authors: {', '.join(metadata.get('authors', ['Unknown'])[:3])}
-                - Published: {metadata.get('published', 'Unknown')}
-                - Length: {paper.get('text_length', 0):,} characters
+                **[Paper {i}] {paper.title}**
+                - Authors: {', '.join(paper.authors[:3])}
+                - Published: {paper.published}
+                - Length: {paper.text_length:,} characters
                 """)
         
+        # Papers and stages cut by the time budget or by failures
+        cut = results.get("cut", {})
+        if cut.get("stages") or cut.get("papers"):
+            notes = [f"{c['stage']}: {c['reason']}" for c in cut.get("stages", [])]
+            notes += [f"{c['title'][:60]} ({c['stage']}: {c['reason']})" for c in cut.get("papers", [])]
+            st.warning("⏱️ Partial results (time budget or failed papers). Cut:\n- " + "\n- ".join(notes))
+        
+        # Stage timings
+        timing = results.get("timing", {})
+        if timing:
+            st.caption(" · ".join(f"{stage.replace('_s', '')}: {seconds:.1f}s" for stage, seconds in timing.items()
+                                  if isinstance(seconds, (int, float))))
+            if "profile" in timing:
+                st.caption(f"Profiles: {timing['profile']['dir']}")
+        
         # Main analysis
         st.markdown("---")
         st.subheader("💡 Synthesized Answer")
@@ -130,10 +150,45 @@ def main():
         st.subheader("🎯 Research Gaps")
         st.markdown(results.get("gap_analysis", "No gap analysis generated"))
         
+        # Follow-up questions answered from this session's papers
+        st.markdown("---")
+        st.subheader("💬 Follow-up Questions")
+        
+        for turn in st.session_state.follow_ups:
+            st.markdown(f"**Q: {turn['question']}**")
+            if turn.get("error"):
+                st.error(f"❌ Error: {turn['error']}")
+                continue
+            st.markdown(turn["answer"])
+            if turn["new_papers"]:
+                st.caption("Added from ArXiv: " + "; ".join(paper.title for paper in turn["new_papers"]))
+            cited = sorted({index for index, _ in turn["sources"]})
+            st.caption(f"Passages from papers {', '.join(map(str, cited))} · "
+                       f"relevance {turn['relevance']:.2f} · {turn['timing'].get('total_s', 0):.1f}s")
+        
+        follow_col1, follow_col2 = st.columns([2, 1])
+        with follow_col1:
+            follow_up = st.text_input(
+                "Ask about these papers:",
+                placeholder="e.g., Which of these methods needs the least training data?",
+                key="follow_up_input"
+            )
+        with follow_col2:
+            st.write("")
+            st.write("")
+            ask_button = st.button("💬 Ask", use_container_width=True)
+        
+        if ask_button and follow_up:
+            with st.spinner("🤖 Searching the session's papers..."):
+                history = [(turn["question"], turn["answer"]) for turn in st.session_state.follow_ups]
+                turn = get_agent().follow_up(follow_up, results, history)
+            st.session_state.follow_ups.append(turn)
+            st.rerun()
+        
         # Download results
         st.markdown("---")
         if st.button("💾 Download Full Report"):
-            report = generate_report(results)
+            report = generate_report(results, st.session_state.follow_ups)
             st.download_button(
                 label="📄 Download Report",
                 data=report,
@@ -142,7 +197,7 @@ def main():
             )
 
 
-def generate_report(results: dict) -> str:
+def generate_report(results: dict, follow_ups: list = ()) -> str:
     """Generate downloadable text report"""
     report = f"""
 RESEARCH PAPER ANALYSIS REPORT
@@ -158,7 +213,7 @@ SUB-QUERIES
 {'='*80}
 PAPERS ANALYZED
 {'='*80}
-{chr(10).join(f"[{i}] {p.get('arxiv_metadata', {}).get('title', 'Unknown')}" for i, p in enumerate(results.get('papers', []), 1))}
+{chr(10).join(f"[{i}] {p.title}" for i, p in enumerate(results.get('papers', []), 1))}
 
 {'='*80}
 SYNTHESIZED ANSWER
@@ -175,6 +230,11 @@ RESEARCH GAPS
 {'='*80}
 {results.get('gap_analysis', '')}
 
+{'='*80}
+FOLLOW-UP QUESTIONS
+{'='*80}
+{chr(10).join(f"Q: {turn['question']}{chr(10)}A: {turn['answer']}{chr(10)}" for turn in follow_ups)}
+
 {'='*80}
 END OF REPORT
 {'='*80}
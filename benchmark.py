@@ -0,0 +1,350 @@
+"""
+Performance Benchmarks
+Run with: python benchmark.py <benchmark> [options]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import string
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from src.agent.orchestrator import ResearchAgent
+from src.agent.rate_limiter import PRIORITIES
+from src.retrieval.artifact_store import ArtifactStore
+from src.retrieval.extractors import available_extractors, benchmark_extractors, sample_corpus
+from src.retrieval.paper_record import PaperRecord
+
+
+# Recorded cold start (importing the agent and constructing it), measured in
+# bare interpreter starts so the gate carries across machines, and the
+# slowdown over it that counts as a regression
+STARTUP_BASELINE = "startup_baseline.json"
+STARTUP_TOLERANCE = 0.25
+
+# Heavy dependencies that must not load until a request needs them
+DEFERRED_MODULES = ("openai", "arxiv", "pypdf", "requests", "dotenv", "numpy")
+
+# Run in a fresh interpreter so nothing is already imported
+_STARTUP_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from src.agent.orchestrator import ResearchAgent
+imported = time.perf_counter()
+ResearchAgent()
+built = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "init_ms": (built - imported) * 1000,
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+""" % (DEFERRED_MODULES,)
+
+
+def benchmark_analysis(query: str, max_papers: int, runs: int) -> None:
+    """Compare prompt tokens and latency of the sectioned and structured analysis paths"""
+    print("="*60)
+    print("BENCHMARK: Sectioned (3 calls) vs Structured (1 call) analysis")
+    print("="*60)
+
+    agent = ResearchAgent()
+
+    # Fetch papers once so both paths see identical context
+    papers, filepaths = agent.search_papers(query, max_papers)
+    processed = agent.process_papers(filepaths, papers)
+    if not processed:
+        print("\n❌ No papers processed. Exiting.")
+        return
+
+    paths = {
+        "sectioned": lambda: (
+            agent.analyze_papers(query, processed),
+            agent.compare_methodologies(processed),
+            agent.identify_gaps(query, processed),
+        ),
+        "structured": lambda: agent.analyze_all_sections(query, processed),
+    }
+
+    print(f"\n{'path':<12}{'calls':>8}{'prompt tok':>14}{'compl tok':>12}{'latency s':>12}{'limiter s':>12}")
+    for name, run in paths.items():
+        before = agent.llm.get_stats()
+        start = time.perf_counter()
+        for _ in range(runs):
+            run()
+        elapsed = (time.perf_counter() - start) / runs
+        after = agent.llm.get_stats()
+
+        calls = (after["calls"] - before["calls"]) / runs
+        prompt_tokens = (after["prompt_tokens"] - before["prompt_tokens"]) / runs
+        completion_tokens = (after["completion_tokens"] - before["completion_tokens"]) / runs
+        waited = (after["rate_limit_wait_s"] - before["rate_limit_wait_s"]) / runs
+        print(f"{name:<12}{calls:>8.1f}{prompt_tokens:>14.0f}{completion_tokens:>12.0f}{elapsed:>12.2f}"
+              f"{waited:>12.2f}")
+
+    # Waits per priority class tell limit-bound from latency-bound load
+    metrics = agent.llm.rate_limiter.get_metrics()
+    print(f"\nRate limiter ({metrics['queued']} queued):")
+    for priority in PRIORITIES:
+        m = metrics[priority]
+        print(f"   {priority:<12}{m['requests']:>6} requests, {100 * m['limited_fraction']:.0f}% limited, "
+              f"avg wait {m['avg_wait_s']:.2f}s, max {m['max_wait_s']:.2f}s")
+
+
+def benchmark_gather(query: str, max_papers: int, runs: int) -> None:
+    """Measure how much of the decomposition call the speculative search and downloads hide"""
+    print("="*60)
+    print("BENCHMARK: Query decomposition overlapped with search and downloads")
+    print("="*60)
+
+    agent = ResearchAgent()
+    samples = []
+    for _ in range(runs):
+        timing = {}
+        start = time.perf_counter()
+        agent.gather_papers(query, max_papers, timing=timing)
+        timing["gather_s"] = time.perf_counter() - start
+        samples.append(timing)
+
+    print(f"\n{'stage':<22}{'median s':>10}")
+    for key in ("search_s", "decompose_s", "decompose_wait_s", "gather_s"):
+        print(f"{key:<22}{statistics.median(sample[key] for sample in samples):>10.2f}")
+
+    # Decomposition time not spent blocked is time the overlap saved
+    decompose = statistics.median(sample["decompose_s"] for sample in samples)
+    blocked = statistics.median(sample["decompose_wait_s"] for sample in samples)
+    hidden = 1 - blocked / decompose if decompose else 1.0
+    print(f"\n   decomposition hidden: {100 * hidden:.0f}% ({decompose - blocked:.2f}s of {decompose:.2f}s)")
+
+
+def _synthetic_paper(i: int, text_chars: int) -> dict:
+    """A processed-paper dict shaped like PDFProcessor output"""
+    words = ["".join(random.choices(string.ascii_lowercase, k=random.randint(3, 10))) for _ in range(2000)]
+    text = " ".join(random.choices(words, k=text_chars // 6))[:text_chars]
+    return {
+        "filename": f"2401.{i:05d}v1.pdf",
+        "filepath": f"data/raw/2401.{i:05d}v1.pdf",
+        "text": text,
+        "text_length": len(text),
+        "pdf_metadata": {"title": "Unknown", "author": "Unknown", "subject": "", "creator": "",
+                         "producer": "pdfTeX", "num_pages": 12},
+        "arxiv_metadata": {
+            "title": f"Synthetic paper {i}",
+            "authors": [f"Author {j}" for j in range(6)],
+            "summary": text[:1500],
+            "published": "2024-01-01",
+            "arxiv_id": f"2401.{i:05d}v1",
+            "pdf_url": f"https://arxiv.org/pdf/2401.{i:05d}v1",
+            "categories": ["cs.CL", "cs.LG"],
+        },
+    }
+
+
+def benchmark_memory(papers: int, text_kb: int) -> None:
+    """Compare resident memory of one session's results: dicts with full text vs PaperRecords"""
+    print("="*60)
+    print("BENCHMARK: Per-session results memory, dicts vs PaperRecords")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as root:
+        store = ArtifactStore(root=root)
+        for i in range(papers):
+            paper = _synthetic_paper(i, text_kb * 1024)
+            store.put_text(paper["arxiv_metadata"]["arxiv_id"], paper["text"])
+
+        def measure(build) -> int:
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            kept = [build(i) for i in range(papers)]
+            after = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del kept
+            return after - before
+
+        dict_bytes = measure(lambda i: _synthetic_paper(i, text_kb * 1024))
+        record_bytes = measure(lambda i: PaperRecord.from_paper_data(_synthetic_paper(i, text_kb * 1024), store))
+
+    print(f"\n{papers} papers x {text_kb} KB text")
+    print(f"   dicts:   {dict_bytes / 1024:>10,.0f} KB")
+    print(f"   records: {record_bytes / 1024:>10,.0f} KB")
+    print(f"   reduction: {100 * (1 - record_bytes / dict_bytes):.1f}%")
+
+
+def benchmark_pdf_extractors(directory: str, samples: int, pages: int) -> None:
+    """Time every installed extraction backend on local PDFs and show which is acceptable"""
+    print("="*60)
+    print("BENCHMARK: PDF extraction backends")
+    print("="*60)
+
+    paths = sample_corpus(directory, limit=samples)
+    if not paths:
+        print(f"\n❌ No PDFs in {directory}. Exiting.")
+        return
+
+    backends = available_extractors()
+    print(f"\n{len(paths)} PDFs x first {pages} pages, backends: {', '.join(backends)}")
+    rows = benchmark_extractors(paths, backends, max_pages=pages)
+
+    print(f"\n{'backend':<14}{'seconds':>10}{'chars':>10}{'acceptable':>12}")
+    for row in sorted(rows, key=lambda r: r["seconds"]):
+        print(f"{row['name']:<14}{row['seconds']:>10.3f}{row['chars']:>10}{str(row['acceptable']):>12}")
+        if row["error"]:
+            print(f"   error: {row['error']}")
+
+
+def _parse_importtime(stderr: str) -> dict:
+    """Cumulative import time (ms) per module from `python -X importtime` output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative) / 1000
+    return modules
+
+
+def benchmark_startup(runs: int, baseline_path: str, tolerance: float, top: int, record: bool) -> bool:
+    """
+    Measure cold import and agent construction time against a recorded baseline
+
+    The total is compared as a multiple of a bare interpreter start timed in
+    the same run, so a faster or slower machine does not move the gate. A
+    baseline recorded under another Python version is not compared against,
+    since import costs change between versions; record a new one instead.
+
+    Returns False if the relative total exceeds the baseline by more than
+    `tolerance` or a heavy import is eager. With `record`, the measurement
+    becomes the new baseline instead.
+    """
+    print("="*60)
+    print("BENCHMARK: Cold start (import + ResearchAgent construction)")
+    print("="*60)
+
+    repo = os.path.dirname(os.path.abspath(__file__))
+    baseline_path = os.path.join(repo, baseline_path)
+    samples, bare, modules, loaded = [], [], {}, set()
+
+    # A scratch working directory keeps the probe's data/ and .env out of the measurement
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(os.environ, PYTHONPATH=repo)
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", "pass"], cwd=scratch, env=env, check=True)
+            bare.append((time.perf_counter() - start) * 1000)
+
+            probe = subprocess.run([sys.executable, "-X", "importtime", "-c", _STARTUP_PROBE],
+                                   cwd=scratch, env=env, capture_output=True, text=True, check=True)
+            result = json.loads(probe.stdout.strip().splitlines()[-1])
+            samples.append(result)
+            loaded.update(result["loaded"])
+            for name, ms in _parse_importtime(probe.stderr).items():
+                modules.setdefault(name, []).append(ms)
+
+    import_ms = statistics.median(sample["import_ms"] for sample in samples)
+    init_ms = statistics.median(sample["init_ms"] for sample in samples)
+    total_ms = import_ms + init_ms
+    bare_ms = statistics.median(bare)
+    relative = total_ms / bare_ms
+    python = "%d.%d" % sys.version_info[:2]
+
+    print(f"\nSlowest modules by cumulative import time (median of {runs} runs):")
+    ranked = sorted(((statistics.median(times), name) for name, times in modules.items()), reverse=True)
+    shown = [(ms, name) for ms, name in ranked if name.startswith("src.")][:top]
+    shown += [(ms, name) for ms, name in ranked if "." not in name and not name.startswith("src")][:top]
+    for ms, name in sorted(shown, reverse=True):
+        print(f"   {name:<40}{ms:>10.1f} ms")
+
+    print(f"\n   import:  {import_ms:>8.1f} ms")
+    print(f"   init:    {init_ms:>8.1f} ms")
+    print(f"   total:   {total_ms:>8.1f} ms")
+    print(f"   bare interpreter start: {bare_ms:.1f} ms, so the cold start costs {relative:.2f}x one (Python {python})")
+
+    ok = True
+    if loaded:
+        print(f"\n❌ Imported at start-up instead of on first use: {', '.join(sorted(loaded))}")
+        ok = False
+
+    if record:
+        if not ok:
+            print("\n❌ Not recording a baseline with eager heavy imports")
+            return False
+        with open(baseline_path, "w") as f:
+            json.dump({"import_ms": round(import_ms, 1), "init_ms": round(init_ms, 1),
+                       "total_ms": round(total_ms, 1), "bare_ms": round(bare_ms, 1),
+                       "relative": round(relative, 3), "python": python}, f, indent=2)
+            f.write("\n")
+        print(f"\n✅ Recorded baseline in {baseline_path}")
+        return True
+
+    if not os.path.exists(baseline_path):
+        print(f"\n❌ No baseline at {baseline_path}; record one with --record")
+        return False
+
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    if "relative" not in baseline or baseline.get("python") != python:
+        print(f"\n⚠️  Baseline was recorded under Python {baseline.get('python', '?')}, not {python}, "
+              f"or predates relative timing; not comparing. Record one here with --record")
+        return ok
+
+    limit = baseline["relative"] * (1 + tolerance)
+    print(f"   baseline: {baseline['relative']:.2f}x  (limit {limit:.2f}x at +{100 * tolerance:.0f}%)")
+    if relative > limit:
+        print(f"\n❌ Cold start regressed {100 * (relative / baseline['relative'] - 1):.0f}% over the baseline")
+        ok = False
+    if ok:
+        print("\n✅ Within tolerance of the baseline")
+    return ok
+
+
+def main():
+    """Parse arguments and run the selected benchmark"""
+    parser = argparse.ArgumentParser(description="Research Paper Analyzer benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    analysis = subparsers.add_parser("analysis", help="Compare analysis prompting strategies")
+    analysis.add_argument("--query", default="What are the latest advances in transformer architectures?")
+    analysis.add_argument("--max-papers", type=int, default=5)
+    analysis.add_argument("--runs", type=int, default=1)
+
+    gather = subparsers.add_parser("gather", help="Decomposition overlap with search and downloads")
+    gather.add_argument("--query", default="What are the latest advances in transformer architectures?")
+    gather.add_argument("--max-papers", type=int, default=5)
+    gather.add_argument("--runs", type=int, default=3)
+
+    memory = subparsers.add_parser("memory", help="Per-session memory of paper results")
+    memory.add_argument("--papers", type=int, default=10)
+    memory.add_argument("--text-kb", type=int, default=60)
+
+    extractors = subparsers.add_parser("extractors", help="Compare PDF extraction backends")
+    extractors.add_argument("--dir", default="data/raw")
+    extractors.add_argument("--samples", type=int, default=5)
+    extractors.add_argument("--pages", type=int, default=10)
+
+    startup = subparsers.add_parser("startup", help="Cold-start import and init time against a recorded baseline")
+    startup.add_argument("--runs", type=int, default=5)
+    startup.add_argument("--baseline", default=STARTUP_BASELINE)
+    startup.add_argument("--tolerance", type=float, default=STARTUP_TOLERANCE)
+    startup.add_argument("--record", action="store_true", help="Save this measurement as the baseline")
+    startup.add_argument("--top", type=int, default=10)
+
+    args = parser.parse_args()
+
+    if args.benchmark == "analysis":
+        benchmark_analysis(args.query, args.max_papers, args.runs)
+    elif args.benchmark == "gather":
+        benchmark_gather(args.query, args.max_papers, args.runs)
+    elif args.benchmark == "memory":
+        benchmark_memory(args.papers, args.text_kb)
+    elif args.benchmark == "extractors":
+        benchmark_pdf_extractors(args.dir, args.samples, args.pages)
+    elif args.benchmark == "startup":
+        if not benchmark_startup(args.runs, args.baseline, args.tolerance, args.top, args.record):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,30 +3,73 @@ NVIDIA NIM LLM Client
 Connects to llama-3_1-nemotron-nano-8B-v1 via NVIDIA NIM
 """
 import os
-from openai import OpenAI
-from dotenv import load_dotenv
+import threading
+import time
+from src.agent.rate_limiter import RateLimiter, get_rate_limiter
+from src.agent.resilience import (
+    CircuitOpenError, DeadlineExceeded, ResilientExecutor, get_resilient_executor
+)
+from src.utils.helpers import load_env
 
-load_dotenv()
+# openai takes over half a second to import, so it is imported when a
+# client is built rather than with this module
+
+
+class NIMError(Exception):
+    """Raised when a NIM call fails after retries, times out or is rejected"""
+
+
+def is_retryable(error: Exception) -> bool:
+    """Transient NIM failures worth retrying: timeouts, connection errors, 429 and 5xx"""
+    from openai import APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+    
+    if isinstance(error, (APITimeoutError, APIConnectionError, RateLimitError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
 
 
 class NvidiaLLMClient:
     """Client for NVIDIA NIM inference microservice"""
     
-    def __init__(self):
+    def __init__(self, rate_limiter: RateLimiter = None, executor: ResilientExecutor = None,
+                 timeout: float = None):
+        """
+        Args:
+            rate_limiter: Request scheduler (defaults to the process-wide one)
+            executor: Retry/hedge/circuit-breaker policy (defaults to the process-wide one)
+            timeout: Deadline in seconds for one generate_response call,
+                including retries (default NIM_TIMEOUT_S or 90)
+        """
+        from openai import OpenAI
+        
+        load_env()
         self.api_key = os.getenv("NVIDIA_API_KEY")
         if not self.api_key:
             raise ValueError("NVIDIA_API_KEY not found in environment variables")
         
-        # NVIDIA NIM uses OpenAI-compatible API
+        # NVIDIA NIM uses OpenAI-compatible API; retries are handled by the executor
         self.client = OpenAI(
-            base_url="https://integrate.api.nvidia.com/v1",
-            api_key=self.api_key
+            base_url=os.getenv("NIM_BASE_URL", "https://integrate.api.nvidia.com/v1"),
+            api_key=self.api_key,
+            max_retries=0
         )
         
+        self.timeout = timeout or float(os.getenv("NIM_TIMEOUT_S", "90"))
+        self.executor = executor or get_resilient_executor()
+        
         # Model specified in hackathon requirements
         self.model = "meta/llama-3.1-8b-instruct"
+        
+        # Shared across clients so all sessions respect one set of limits
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        
+        # Cumulative usage, read by benchmarks to compare prompting strategies
+        self._stats_lock = threading.Lock()
+        self.stats = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                      "latency_s": 0.0, "rate_limit_wait_s": 0.0}
     
-    def generate_response(self, prompt: str, system_message: str = None, max_tokens: int = 1000) -> str:
+    def generate_response(self, prompt: str, system_message: str = None, max_tokens: int = 1000,
+                          priority: str = "interactive", deadline_s: float = None) -> str:
         """
         Generate a response from the LLM
         
@@ -34,10 +77,16 @@ class NvidiaLLMClient:
             prompt: User prompt
             system_message: System instruction (optional)
             max_tokens: Maximum response length
+            priority: Scheduling class, "interactive" or "batch"
+            deadline_s: Caller's remaining time budget; caps the client timeout
             
         Returns:
             Generated text response
         """
+        budget = self.timeout if deadline_s is None else min(self.timeout, deadline_s)
+        if budget <= 0:
+            raise NIMError("NVIDIA NIM call skipped: deadline already passed")
+        
         messages = []
         
         if system_message:
@@ -45,18 +94,80 @@ class NvidiaLLMClient:
         
         messages.append({"role": "user", "content": prompt})
         
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                max_tokens=max_tokens,
-                temperature=0.7
-            )
+        estimated = self._estimate_tokens(messages, max_tokens)
+        
+        from openai import RateLimitError
+        
+        def attempt(timeout: float) -> str:
+            waited = self.rate_limiter.acquire(estimated, priority, timeout=timeout)
+            
+            try:
+                start = time.perf_counter()
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=0.7,
+                    timeout=max(1.0, timeout - waited)
+                )
+            except RateLimitError as e:
+                self._penalize(e)
+                raise
+            
+            self._record_usage(response, time.perf_counter() - start, waited)
+            
+            if response.usage:
+                self.rate_limiter.settle(estimated, response.usage.total_tokens)
             
             return response.choices[0].message.content
         
+        try:
+            return self.executor.call(attempt, budget, is_retryable)
+        
+        except CircuitOpenError as e:
+            raise NIMError(f"NVIDIA NIM unavailable: {str(e)}") from e
+        
+        except (DeadlineExceeded, TimeoutError) as e:
+            raise NIMError(f"NVIDIA NIM call timed out after {budget:.0f}s: {str(e)}") from e
+        
         except Exception as e:
-            raise Exception(f"Error calling NVIDIA NIM: {str(e)}")
+            raise NIMError(f"Error calling NVIDIA NIM: {str(e)}") from e
+    
+    @staticmethod
+    def _estimate_tokens(messages: list, max_tokens: int) -> int:
+        """Rough token estimate (~4 chars per token) used to reserve rate-limit budget"""
+        prompt_chars = sum(len(message["content"]) for message in messages)
+        return prompt_chars // 4 + max_tokens
+    
+    def _penalize(self, error: Exception) -> None:
+        """Back off all callers after a 429, honouring Retry-After when present"""
+        retry_after = None
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+        
+        try:
+            seconds = float(retry_after) if retry_after else 5.0
+        except ValueError:
+            seconds = 5.0
+        
+        self.rate_limiter.penalize(seconds)
+    
+    def _record_usage(self, response, latency: float, waited: float = 0.0) -> None:
+        """Add token usage and latency of one completion to the running stats"""
+        usage = getattr(response, "usage", None)
+        with self._stats_lock:
+            self.stats["calls"] += 1
+            self.stats["latency_s"] += latency
+            self.stats["rate_limit_wait_s"] += waited
+            if usage:
+                self.stats["prompt_tokens"] += usage.prompt_tokens or 0
+                self.stats["completion_tokens"] += usage.completion_tokens or 0
+    
+    def get_stats(self) -> dict:
+        """Return a snapshot of cumulative usage stats"""
+        with self._stats_lock:
+            return dict(self.stats)
     
     def stream_response(self, prompt: str, system_message: str = None):
         """
@@ -76,13 +187,16 @@ class NvidiaLLMClient:
         
         messages.append({"role": "user", "content": prompt})
         
+        self.rate_limiter.acquire(self._estimate_tokens(messages, 1000))
+        
         try:
             stream = self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
                 max_tokens=1000,
                 temperature=0.7,
-                stream=True
+                stream=True,
+                timeout=self.timeout
             )
             
             for chunk in stream:
@@ -90,4 +204,4 @@ class NvidiaLLMClient:
                     yield chunk.choices[0].delta.content
         
         except Exception as e:
-            raise Exception(f"Error streaming from NVIDIA NIM: {str(e)}")
\ No newline at end of file
+            raise NIMError(f"Error streaming from NVIDIA NIM: {str(e)}") from e
\ No newline at end of file
@@ -6,30 +6,138 @@ Coordinates the entire agentic workflow:
 3. Multi-step reasoning
 4. Synthesis with citations
 """
-from typing import List, Dict, Tuple
-from src.agent.llm_client import NvidiaLLMClient
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from typing import List, Dict, Optional, Tuple
+from src.agent.llm_client import NIMError, NvidiaLLMClient
+from src.agent.resilience import Deadline
+from src.agent.summary_cache import SummaryCache
 from src.retrieval.arxiv_fetcher import ArxivFetcher
+from src.retrieval.artifact_store import get_artifact_store
+from src.retrieval.dedup import NearDuplicateIndex, deduplicate_candidates
+from src.retrieval.extractors import PDFSource
+from src.retrieval.paper_library import PaperLibrary
+from src.retrieval.paper_record import PaperRecord
 from src.retrieval.pdf_processor import PDFProcessor
+from src.retrieval.ranking import PassageIndex, rank_papers
+from src.retrieval.sections import body_end
+from src.utils.helpers import extract_json_object, load_env
+from src.utils.profiling import ProfileRun, Profiler, get_profiler, profile_stage
+
+
+# Result sections produced by the analysis stage
+SECTION_KEYS = ("analysis", "methodology_comparison", "gap_analysis")
+
+# "sectioned": one LLM call per section; "structured": one JSON call for all;
+# "map_reduce": summarize each paper, then synthesize from the summaries;
+# "auto": structured while every paper fits in the context, map_reduce beyond
+ANALYSIS_MODES = ("sectioned", "structured", "map_reduce", "auto")
+
+# Bump when the map prompt changes so cached summaries are regenerated
+SUMMARY_PROMPT_VERSION = "v2"
+
+# Sections each stage reads (see sections.SECTION_HEADINGS); references and
+# appendices are never sent
+ANALYSIS_SECTIONS = ("introduction", "methods", "results", "conclusion")
+METHODS_SECTIONS = ("methods", "experiments")
+GAP_SECTIONS = ("related_work", "results", "conclusion")
+SUMMARY_SECTIONS = ("abstract", "introduction", "methods", "experiments", "results", "conclusion")
+
+# The structured call's labeled excerpts, one per output it produces:
+# (label, sections, share of the per-paper excerpt budget)
+STRUCTURED_EXCERPTS = (
+    ("Findings excerpt", ANALYSIS_SECTIONS, 0.4),
+    ("Methods excerpt", METHODS_SECTIONS, 0.3),
+    ("Gaps excerpt", GAP_SECTIONS, 0.3),
+)
+
+# Follow-ups: passage size, passages sent, and the best-passage TF-IDF score
+# below which the session's papers are topped up from ArXiv
+FOLLOW_UP_CHUNK_CHARS = 1500
+FOLLOW_UP_PASSAGES = 8
+FOLLOW_UP_MIN_RELEVANCE = 0.2
+
+# Share of the request deadline by which each stage must finish; unused
+# time carries over and analysis gets whatever remains
+STAGE_CHECKPOINTS = {"gather": 0.4, "process": 0.6}
+
+# Share of the analysis budget given to map-reduce summaries, the rest to the reduce call
+MAP_BUDGET_SHARE = 0.6
+
+# Sub-query hits that may take the slot of a prefetched paper; each one is a
+# download started only after decomposition, back on the critical path
+MAX_DISPLACED_PREFETCHES = 1
 
 
 class ResearchAgent:
     """Autonomous research paper analysis agent"""
     
-    def __init__(self):
-        self.llm = NvidiaLLMClient()
-        self.fetcher = ArxivFetcher()
-        self.processor = PDFProcessor()
+    def __init__(self, library: PaperLibrary = None, analysis_mode: str = "auto",
+                 summary_cache: SummaryCache = None, map_workers: int = 4,
+                 download_workers: int = 3, overfetch: int = 3, ephemeral: bool = None,
+                 deadline_s: float = None, profiler: Profiler = None):
+        """
+        Args:
+            library: Local paper library (defaults to data/library.db)
+            analysis_mode: One of ANALYSIS_MODES
+            summary_cache: Per-paper summary cache for map_reduce
+            map_workers: Concurrent per-paper summaries
+            download_workers: Concurrent PDF downloads
+            overfetch: Candidates searched per paper kept, for ranking
+            ephemeral: Extract downloaded PDFs in memory without storing
+                them; defaults to env EPHEMERAL_PDFS=1
+            deadline_s: Time budget per analysis request (0 disables);
+                defaults to env ANALYSIS_DEADLINE_S or 240
+            profiler: Records memory and CPU per stage and per paper;
+                defaults to get_profiler() (on when PROFILE_DIR is set)
+        """
+        if analysis_mode not in ANALYSIS_MODES:
+            raise ValueError(f"analysis_mode must be one of {ANALYSIS_MODES}")
+        
+        load_env()
+        self.analysis_mode = analysis_mode
+        self.profiler = profiler or get_profiler()
+        self.store = get_artifact_store()
+        self.fetcher = ArxivFetcher(self.store)
+        self.processor = PDFProcessor(self.store, profiler=self.profiler)
+        self.library = library or PaperLibrary()
+        self.summary_cache = summary_cache or SummaryCache()
+        self.map_workers = map_workers
+        self.download_workers = download_workers
+        self.overfetch = overfetch
+        self.ephemeral = ephemeral if ephemeral is not None else os.getenv("EPHEMERAL_PDFS", "0") == "1"
+        self.deadline_s = deadline_s if deadline_s is not None else float(os.getenv("ANALYSIS_DEADLINE_S", "240"))
+        
+        # The LLM client is built on first use so the UI can render before openai loads
+        self._llm = None
+        self._llm_lock = threading.Lock()
+        
+        # Follow-up passage index over the last analysis's papers (see retrieve_passages)
+        self._passages = None
+        self._passages_lock = threading.Lock()
         
         # Agent prompts
         self.system_prompt = """You are an expert research assistant that helps analyze and synthesize information from academic papers. 
 You provide accurate, well-cited answers based on the papers provided."""
     
-    def decompose_query(self, query: str) -> List[str]:
+    @property
+    def llm(self) -> NvidiaLLMClient:
+        """NIM client, constructed on first access"""
+        with self._llm_lock:
+            if self._llm is None:
+                self._llm = NvidiaLLMClient()
+            return self._llm
+    
+    def decompose_query(self, query: str, deadline: Deadline = None) -> List[str]:
         """
         Break down complex research question into sub-queries
         
         Args:
             query: Original research question
+            deadline: Optional time budget for the LLM call
             
         Returns:
             List of sub-queries
@@ -43,7 +151,8 @@ Sub-questions:"""
         
         response = self.llm.generate_response(
             prompt=prompt,
-            system_message="You are a research methodology expert."
+            system_message="You are a research methodology expert.",
+            deadline_s=_remaining(deadline)
         )
         
         # Parse sub-queries
@@ -55,7 +164,77 @@ Sub-questions:"""
         
         return sub_queries
     
-    def search_papers(self, query: str, max_results: int = 5) -> Tuple[List[Dict], List[str]]:
+    def find_candidates(self, query: str, max_results: int = 5, overfetch: int = 1) -> List[Dict]:
+        """
+        Find paper metadata for a query, preferring the local library over ArXiv
+        
+        Library hits keep a "filepath" key (None when only their extracted
+        text is stored); ArXiv hits have no "filepath" and still need downloading.
+        ArXiv is only searched when the library has fewer than `max_results`
+        usable papers.
+        
+        Args:
+            query: Search query
+            max_results: Papers needed
+            overfetch: Return up to max_results * overfetch candidates for
+                re-ranking
+            
+        Returns:
+            List of paper metadata, best first
+        """
+        candidates = []
+        limit = max_results * overfetch
+        
+        # Check the local library first
+        for paper in self.library.search(query, limit):
+            filepath = paper["filepath"]
+            has_pdf = filepath and os.path.exists(filepath)
+            
+            if has_pdf or self.store.has_text(paper["arxiv_id"]):
+                paper["filepath"] = filepath if has_pdf else None
+                candidates.append(paper)
+        
+        if candidates:
+            print(f"📚 Found {len(candidates)} papers in local library")
+        
+        if len(candidates) >= max_results:
+            return candidates
+        
+        # Top up from ArXiv, skipping papers we already have
+        known_ids = {paper["arxiv_id"] for paper in candidates}
+        
+        for paper in self.fetcher.search_papers(query, limit):
+            self.library.add_paper(paper)
+            
+            if paper["arxiv_id"] not in known_ids and len(candidates) < limit:
+                candidates.append(paper)
+        
+        return candidates
+    
+    def download_candidate(self, paper: Dict) -> Optional[PDFSource]:
+        """
+        Download a candidate's PDF into memory and record it in the library
+        
+        Unless the agent is ephemeral, the PDF is also written to the
+        artifact store in the background.
+        
+        Args:
+            paper: Candidate from find_candidates
+            
+        Returns:
+            Path of a stored PDF, the PDF bytes, or None if the download failed
+        """
+        source = self.fetcher.fetch_pdf(paper, persist=not self.ephemeral)
+        if source is None:
+            return None
+        
+        if isinstance(source, str):
+            self.library.add_paper(paper, source)
+        else:
+            self.library.add_paper(paper, None if self.ephemeral else self.store.pdf_path(paper["arxiv_id"]))
+        return source
+    
+    def search_papers(self, query: str, max_results: int = 5) -> Tuple[List[Dict], List[PDFSource]]:
         """
         Search and download papers for a query
         
@@ -64,37 +243,319 @@ Sub-questions:"""
             max_results: Maximum papers to fetch
             
         Returns:
-            Tuple of (paper metadata, file paths)
+            Tuple of (paper metadata, PDF paths or bytes), aligned by index.
+            The source is None for library papers whose text is already extracted.
+        """
+        # Over-fetch metadata, then download only the most relevant abstracts
+        candidates = self.find_candidates(query, max_results, self.overfetch)
+        ranked = deduplicate_candidates(rank_papers(query, [], candidates))
+        return self._collect_papers(ranked[:max_results], {}, spares=ranked[max_results:])
+    
+    def _collect_papers(self, selected: List[Dict], downloads: Dict[str, Future],
+                        deadline: Deadline = None, cuts: Dict = None, spares: List[Dict] = None,
+                        download_pool: ThreadPoolExecutor = None) -> Tuple[List[Dict], List[PDFSource]]:
         """
-        papers, filepaths = self.fetcher.fetch_and_download(query, max_results)
+        Wait for the selected candidates' PDFs, downloading any not yet started
+        
+        A candidate whose download fails is cut and replaced by the next
+        spare, while the deadline allows.
+        
+        Args:
+            selected: Candidates to keep
+            downloads: In-flight downloads by arxiv_id
+            deadline: Optional budget; downloads still running when it passes are cut
+            cuts: Collects cut papers (see run_full_analysis)
+            spares: Lower-ranked candidates to backfill failed downloads from, best first
+            download_pool: Runs backfill downloads (inline when None)
+            
+        Returns:
+            Tuple of (paper metadata, PDF paths or bytes), aligned by index
+        """
+        papers, filepaths = [], []
+        pending, spares = list(selected), list(spares or [])
+        
+        while pending:
+            paper = pending.pop(0)
+            arxiv_id = paper["arxiv_id"]
+            
+            if "filepath" in paper:
+                filepath = paper["filepath"]
+            elif arxiv_id in downloads:
+                try:
+                    filepath = downloads[arxiv_id].result(timeout=_remaining(deadline))
+                except FutureTimeout:
+                    _cut_paper(cuts, arxiv_id, paper["title"], "download", "download missed its budget")
+                    continue
+            else:
+                filepath = self.download_candidate(paper)
+            
+            if filepath is None and "filepath" not in paper:
+                _cut_paper(cuts, arxiv_id, paper["title"], "download", "download failed")
+                if spares and not (deadline and deadline.expired()):
+                    spare = spares.pop(0)
+                    if download_pool and "filepath" not in spare and spare["arxiv_id"] not in downloads:
+                        downloads[spare["arxiv_id"]] = download_pool.submit(self.download_candidate, spare)
+                    pending.append(spare)
+                continue
+            
+            papers.append({key: value for key, value in paper.items() if key != "filepath"})
+            filepaths.append(filepath)
+        
+        print(f"\n✅ Collected {len(papers)}/{len(selected)} papers")
         return papers, filepaths
     
-    def process_papers(self, filepaths: List[str], papers_metadata: List[Dict]) -> List[Dict]:
+    @staticmethod
+    def _merge_candidates(result_lists: List[List[Dict]]) -> List[Dict]:
+        """Union of per-query candidates in first-seen order, without duplicates"""
+        merged, seen = [], set()
+        
+        for results in result_lists:
+            for paper in results:
+                if paper["arxiv_id"] not in seen:
+                    seen.add(paper["arxiv_id"])
+                    merged.append(paper)
+        
+        return merged
+    
+    def gather_papers(self, query: str, max_papers: int = 5, deadline: Deadline = None,
+                      cuts: Dict = None, timing: Dict = None) -> Tuple[List[str], List[Dict], List[PDFSource]]:
         """
-        Extract text from downloaded papers
+        Decompose the query while speculatively fetching papers for it
+        
+        The original-query search and its downloads start immediately and
+        overlap the decomposition LLM call. Candidates are over-fetched and
+        ranked by abstract relevance so only the top ones are downloaded.
+        Sub-query results are merged in and re-ranked once decomposition
+        returns; at most MAX_DISPLACED_PREFETCHES of them may take a
+        prefetched paper's slot, and queued downloads of candidates that lose
+        their slot are cancelled.
+        
+        `timing` receives search_s (original-query search), decompose_s (the
+        LLM call) and decompose_wait_s (time spent blocked on decomposition
+        after the search returned, i.e. the part the overlap did not hide).
+        
+        Under a deadline, decomposition and sub-query searches that run late
+        are skipped (the original query is used alone), sub-query searches
+        get at most half of the remaining time, and papers whose downloads
+        miss the deadline are dropped.
         
         Args:
-            filepaths: List of PDF paths
+            query: Research question
+            max_papers: Maximum papers to keep
+            deadline: Optional budget for the whole stage
+            cuts: Collects cut papers and stages (see run_full_analysis)
+            timing: Receives the overlap timings above
+            
+        Returns:
+            Tuple of (sub-queries, paper metadata, PDF paths or bytes)
+        """
+        timing = {} if timing is None else timing
+        search_pool = ThreadPoolExecutor(max_workers=4)
+        download_pool = ThreadPoolExecutor(max_workers=self.download_workers)
+        
+        try:
+            decomposition = search_pool.submit(_timed, timing, "decompose_s", self.decompose_query, query, deadline)
+            
+            # Speculative prefetch of the best abstracts for the original query
+            try:
+                candidates = search_pool.submit(
+                    _timed, timing, "search_s", self.find_candidates, query, max_papers, self.overfetch
+                ).result(timeout=_remaining(deadline))
+            except FutureTimeout:
+                _cut_stage(cuts, "search", "ArXiv search missed its budget")
+                return [query], [], []
+            
+            shortlist = deduplicate_candidates(rank_papers(query, [], candidates))[:max_papers]
+            downloads = {
+                paper["arxiv_id"]: download_pool.submit(self.download_candidate, paper)
+                for paper in shortlist if "filepath" not in paper
+            }
+            
+            blocked = time.perf_counter()
+            try:
+                sub_queries = decomposition.result(timeout=_remaining(deadline))
+                print(f"   Generated {len(sub_queries)} sub-questions")
+            except (FutureTimeout, NIMError) as e:
+                if deadline is None:
+                    raise
+                _cut_stage(cuts, "decomposition", f"skipped, searching the original query only ({str(e) or 'timed out'})")
+                sub_queries = [query]
+            finally:
+                timing["decompose_wait_s"] = time.perf_counter() - blocked
+            
+            # Merge in sub-query results and re-rank against all questions
+            search_terms = [self._strip_numbering(sq) for sq in sub_queries]
+            search_terms = [term for term in search_terms if term and term != query]
+            searches = [search_pool.submit(self.find_candidates, term, max_papers) for term in search_terms]
+            done, late = wait(searches, timeout=_remaining(deadline) / 2 if deadline else None)
+            if late:
+                _cut_stage(cuts, "sub_query_search", f"{len(late)} of {len(searches)} sub-query searches missed their budget")
+            sub_results = [future.result() for future in searches if future in done]
+            
+            pool = self._merge_candidates([candidates] + sub_results)
+            ranked = deduplicate_candidates(rank_papers(query, search_terms, pool))
+            selected = self._limit_displacement(ranked, {paper["arxiv_id"] for paper in shortlist}, max_papers)
+            print(f"   Selected {len(selected)} of {len(pool)} candidates by abstract relevance")
+            selected_ids = {paper["arxiv_id"] for paper in selected}
+            
+            # Drop prefetches that lost their slot; ones already running finish
+            # in the background and stay in the library for next time
+            cancelled = [arxiv_id for arxiv_id, future in downloads.items()
+                         if arxiv_id not in selected_ids and future.cancel()]
+            if cancelled:
+                print(f"   Cancelled {len(cancelled)} speculative downloads")
+            
+            for paper in selected:
+                if "filepath" not in paper and paper["arxiv_id"] not in downloads:
+                    downloads[paper["arxiv_id"]] = download_pool.submit(self.download_candidate, paper)
+            
+            spares = [paper for paper in ranked if paper["arxiv_id"] not in selected_ids]
+            papers, filepaths = self._collect_papers(selected, downloads, deadline, cuts, spares, download_pool)
+        
+        finally:
+            # Late searches and downloads finish in the background without holding the request
+            search_pool.shutdown(wait=False)
+            download_pool.shutdown(wait=False)
+        
+        return sub_queries, papers, filepaths
+    
+    @staticmethod
+    def _limit_displacement(ranked: List[Dict], prefetched_ids: set, max_papers: int,
+                            max_displaced: int = MAX_DISPLACED_PREFETCHES) -> List[Dict]:
+        """
+        Top `max_papers` of `ranked`, with at most `max_displaced` papers that
+        still need a download taking the place of a prefetched one
+        
+        Library papers need no download and free slots left by a short
+        prefetch list can always be filled, so neither counts.
+        """
+        allowed = max_displaced + max(0, max_papers - len(prefetched_ids))
+        selected = []
+        
+        for paper in ranked:
+            if len(selected) == max_papers:
+                break
+            if "filepath" not in paper and paper["arxiv_id"] not in prefetched_ids:
+                if allowed == 0:
+                    continue
+                allowed -= 1
+            selected.append(paper)
+        
+        return selected
+    
+    @staticmethod
+    def _strip_numbering(sub_query: str) -> str:
+        """Turn "1. What is X?" into "What is X?" for searching"""
+        return re.sub(r"^\s*\d+[\.\):]?\s*", "", sub_query).strip()
+    
+    def process_papers(self, filepaths: List[PDFSource], papers_metadata: List[Dict],
+                       deadline: Deadline = None, cuts: Dict = None,
+                       profile: ProfileRun = None) -> List[PaperRecord]:
+        """
+        Extract text from downloaded papers, reusing text already in the artifact store
+        
+        Papers whose full text nearly duplicates an earlier (higher-ranked)
+        paper are dropped; metadata dedup can't catch renamed or re-uploaded
+        versions.
+        
+        Under a deadline papers are extracted in parallel and any still
+        extracting when it passes are cut, so one pathological PDF cannot
+        hold the request. A paper whose loading fails is cut with the error
+        instead of failing the analysis.
+        
+        Args:
+            filepaths: List of PDF paths or in-memory PDFs
             papers_metadata: List of paper metadata
+            deadline: Optional budget for the whole stage
+            cuts: Collects cut papers (see run_full_analysis)
+            profile: Profile run to record each extracted paper in
             
         Returns:
-            List of processed paper data
+            List of compact paper records; full text stays in the store
         """
-        return self.processor.process_papers(filepaths, papers_metadata)
+        loaded = []
+        if deadline is None:
+            for filepath, paper in zip(filepaths, papers_metadata):
+                try:
+                    loaded.append(self._load_paper(filepath, paper, profile))
+                except Exception as e:
+                    _cut_paper(cuts, paper["arxiv_id"], paper["title"], "process", f"failed: {e}")
+                    loaded.append(None)
+        else:
+            executor = ThreadPoolExecutor(max_workers=max(1, min(len(filepaths), self.map_workers)))
+            futures = [executor.submit(self._load_paper, filepath, paper, profile)
+                       for filepath, paper in zip(filepaths, papers_metadata)]
+            wait(futures, timeout=deadline.remaining())
+            executor.shutdown(wait=False, cancel_futures=True)
+            
+            for future, paper in zip(futures, papers_metadata):
+                if not future.done() or future.cancelled():
+                    _cut_paper(cuts, paper["arxiv_id"], paper["title"], "process", "extraction missed its budget")
+                    loaded.append(None)
+                elif future.exception() is not None:
+                    _cut_paper(cuts, paper["arxiv_id"], paper["title"], "process", f"failed: {future.exception()}")
+                    loaded.append(None)
+                else:
+                    loaded.append(future.result())
+        
+        processed_papers = []
+        seen_texts = NearDuplicateIndex()
+        
+        for paper, paper_data in zip(papers_metadata, loaded):
+            if not paper_data:
+                continue
+            
+            duplicate = seen_texts.add_if_new(paper["arxiv_id"], paper_data["text"])
+            if duplicate:
+                print(f"  ♻️  Skipping {paper['arxiv_id']}: near-duplicate of {duplicate}")
+                continue
+            
+            # Drop the full text here; records load it from the store on demand
+            processed_papers.append(PaperRecord.from_paper_data(paper_data, self.store))
+        
+        print(f"\n✅ Successfully processed {len(processed_papers)}/{len(filepaths)} papers")
+        return processed_papers
+    
+    def _load_paper(self, filepath: PDFSource, paper: Dict, profile: ProfileRun = None) -> Optional[Dict]:
+        """Processed-paper dict from stored text, or by extracting the PDF (None on failure)"""
+        text = self.store.get_text(paper["arxiv_id"])
+        
+        if text:
+            print(f"📄 Using stored text: {paper['arxiv_id']}")
+            return {
+                "filename": os.path.basename(filepath if isinstance(filepath, str) else ""),
+                "text": text,
+                "text_length": len(text),
+                "sections": self.store.get_sections(paper["arxiv_id"]),
+                "pdf_metadata": self.library.get_pdf_metadata(paper["arxiv_id"]) or {},
+                "arxiv_metadata": paper
+            }
+        
+        if filepath is None:
+            # A library paper whose text was evicted from the store and that has no PDF
+            raise FileNotFoundError("neither its text nor its PDF is stored any more")
+        
+        paper_data = self.processor.process_paper(filepath, paper, profile)
+        if paper_data:
+            self.library.add_text(paper["arxiv_id"], paper_data["text"], paper_data["pdf_metadata"])
+        return paper_data
     
-    def analyze_papers(self, query: str, papers: List[Dict]) -> str:
+    def analyze_papers(self, query: str, papers: List[PaperRecord], context: str = None,
+                       deadline: Deadline = None) -> str:
         """
         Analyze papers and generate answer to query
         
         Args:
             query: Research question
             papers: List of processed papers with text
+            context: Prebuilt paper context (defaults to _build_context)
+            deadline: Optional time budget for the LLM call
             
         Returns:
             Analysis response
         """
         # Prepare context from papers
-        context = self._build_context(papers)
+        context = context or self._build_context(papers)
         
         prompt = f"""Based on the research papers provided below, answer this question comprehensively:
 
@@ -114,18 +575,41 @@ Answer:"""
         response = self.llm.generate_response(
             prompt=prompt,
             system_message=self.system_prompt,
-            max_tokens=1500
+            max_tokens=1500,
+            deadline_s=_remaining(deadline)
         )
         
         return response
     
-    def _build_context(self, papers: List[Dict], max_chars: int = 8000) -> str:
+    def _format_paper(self, index: int, paper: PaperRecord, sections=ANALYSIS_SECTIONS,
+                      structured: bool = False) -> str:
+        """
+        Format one paper as a [Paper N] context block with excerpts of the given
+        sections, or with the labeled STRUCTURED_EXCERPTS when `structured`
+        """
+        if structured:
+            excerpts = "\n".join(f"{label}: {paper.section_text(names, int(2000 * share))}..."
+                                 for label, names, share in STRUCTURED_EXCERPTS)
+        else:
+            excerpts = f"Excerpt: {paper.section_text(sections, 2000)}..."
+        return f"""
+[Paper {index}]
+Title: {paper.title}
+Authors: {', '.join(paper.authors[:3])}
+Summary: {paper.summary}
+{excerpts}
+---"""
+    
+    def _build_context(self, papers: List[PaperRecord], max_chars: int = 8000,
+                       sections=ANALYSIS_SECTIONS, structured: bool = False) -> str:
         """
         Build context string from papers for LLM
         
         Args:
             papers: List of processed papers
             max_chars: Maximum characters to include
+            sections: Sections to excerpt from each paper
+            structured: Use the labeled per-output excerpts instead
             
         Returns:
             Formatted context string
@@ -134,21 +618,7 @@ Answer:"""
         current_length = 0
         
         for i, paper in enumerate(papers, 1):
-            # Get paper info
-            title = paper.get('arxiv_metadata', {}).get('title', 'Unknown Title')
-            authors = paper.get('arxiv_metadata', {}).get('authors', ['Unknown'])
-            summary = paper.get('arxiv_metadata', {}).get('summary', '')
-            
-            # Extract relevant text (first 2000 chars of paper)
-            text_excerpt = paper.get('text', '')[:2000]
-            
-            paper_context = f"""
-[Paper {i}]
-Title: {title}
-Authors: {', '.join(authors[:3])}
-Summary: {summary}
-Excerpt: {text_excerpt}...
----"""
+            paper_context = self._format_paper(i, paper, sections, structured)
             
             # Check if adding this would exceed limit
             if current_length + len(paper_context) > max_chars:
@@ -159,17 +629,25 @@ Excerpt: {text_excerpt}...
         
         return "\n".join(context_parts)
     
-    def compare_methodologies(self, papers: List[Dict]) -> str:
+    def _fits_context(self, papers: List[PaperRecord], max_chars: int = 8000) -> bool:
+        """Whether _build_context can include every paper within max_chars"""
+        total = sum(len(self._format_paper(i, paper, structured=True)) for i, paper in enumerate(papers, 1))
+        return total <= max_chars
+    
+    def compare_methodologies(self, papers: List[PaperRecord], context: str = None,
+                              deadline: Deadline = None) -> str:
         """
         Compare research methodologies across papers
         
         Args:
             papers: List of processed papers
+            context: Prebuilt paper context (defaults to _build_context)
+            deadline: Optional time budget for the LLM call
             
         Returns:
             Comparison analysis
         """
-        context = self._build_context(papers)
+        context = context or self._build_context(papers, sections=METHODS_SECTIONS)
         
         prompt = f"""Compare and contrast the research methodologies used in these papers:
 
@@ -186,23 +664,27 @@ Analysis:"""
         response = self.llm.generate_response(
             prompt=prompt,
             system_message=self.system_prompt,
-            max_tokens=1500
+            max_tokens=1500,
+            deadline_s=_remaining(deadline)
         )
         
         return response
     
-    def identify_gaps(self, query: str, papers: List[Dict]) -> str:
+    def identify_gaps(self, query: str, papers: List[PaperRecord], context: str = None,
+                      deadline: Deadline = None) -> str:
         """
         Identify research gaps based on current literature
         
         Args:
             query: Research area
             papers: List of processed papers
+            context: Prebuilt paper context (defaults to _build_context)
+            deadline: Optional time budget for the LLM call
             
         Returns:
             Gap analysis
         """
-        context = self._build_context(papers)
+        context = context or self._build_context(papers, sections=GAP_SECTIONS)
         
         prompt = f"""Based on these research papers about "{query}", identify gaps in the current literature:
 
@@ -219,18 +701,214 @@ Gap Analysis:"""
         response = self.llm.generate_response(
             prompt=prompt,
             system_message=self.system_prompt,
-            max_tokens=1500
+            max_tokens=1500,
+            deadline_s=_remaining(deadline)
         )
         
         return response
     
-    def run_full_analysis(self, query: str, max_papers: int = 5) -> Dict:
+    def analyze_all_sections(self, query: str, papers: List[PaperRecord], context: str = None,
+                             deadline: Deadline = None) -> Dict[str, str]:
+        """
+        Produce answer, methodology comparison and gap analysis in one LLM call
+        
+        The paper context is sent once instead of three times, with a labeled
+        excerpt per output so each one still reads only the sections it needs.
+        Sections missing from a malformed response are regenerated with the
+        per-section prompts while the deadline allows; those build their own
+        section context unless a prebuilt one was passed in.
+        
+        Args:
+            query: Research question
+            papers: List of processed papers
+            context: Prebuilt paper context (defaults to the structured
+                _build_context)
+            deadline: Optional time budget for all calls
+            
+        Returns:
+            Dictionary keyed by SECTION_KEYS; sections cut by the deadline are absent
+        """
+        prebuilt = context
+        if context is None:
+            context = self._build_context(papers, structured=True)
+            guide = ("Each paper has one excerpt per analysis: base \"analysis\" on the Findings excerpts, "
+                     "\"methodology_comparison\" on the Methods excerpts and \"gap_analysis\" on the Gaps excerpts.\n\n")
+        else:
+            guide = ""
+        
+        prompt = f"""Based on the research papers provided below, produce three analyses for this question:
+
+Question: {query}
+
+Research Papers:
+{context}
+
+{guide}Return a single JSON object with exactly these keys:
+- "analysis": a detailed answer that synthesizes information from multiple papers, identifies key findings and methodologies, and notes contradictions or gaps
+- "methodology_comparison": a comparison of the research methodologies used, their strengths and weaknesses, and which methods are most common
+- "gap_analysis": what topics are well-covered, which perspectives or approaches are missing, and potential research directions
+
+Each value is a markdown string. Cite specific papers using [Paper N] format.
+Return only the JSON object.
+
+JSON:"""
+        
+        response = self.llm.generate_response(
+            prompt=prompt,
+            system_message=self.system_prompt,
+            max_tokens=3000,
+            deadline_s=_remaining(deadline)
+        )
+        
+        parsed = extract_json_object(response) or {}
+        sections = {}
+        for key in SECTION_KEYS:
+            value = parsed.get(key)
+            if isinstance(value, list):
+                value = "\n".join(f"- {item}" for item in value)
+            if isinstance(value, str) and value.strip():
+                sections[key] = value.strip()
+        
+        missing = [key for key in SECTION_KEYS if key not in sections]
+        if missing:
+            print(f"   ⚠️  Structured response missing {', '.join(missing)}, falling back to per-section calls")
+        
+        fallbacks = {
+            "analysis": lambda: self.analyze_papers(query, papers, prebuilt, deadline),
+            "methodology_comparison": lambda: self.compare_methodologies(papers, prebuilt, deadline),
+            "gap_analysis": lambda: self.identify_gaps(query, papers, prebuilt, deadline),
+        }
+        for key in missing:
+            try:
+                sections[key] = fallbacks[key]()
+            except NIMError:
+                # Out of time: keep the sections we have
+                if deadline is None or not deadline.expired():
+                    raise
+                break
+        
+        return sections
+    
+    def summarize_paper(self, paper: PaperRecord, deadline: Deadline = None) -> str:
+        """
+        Summarize a single paper (map step), using the summary cache
+        
+        Summaries are query-independent so a paper is only ever summarized
+        once per model and prompt version; the reduce step applies the query.
+        
+        Args:
+            paper: Processed paper data
+            deadline: Optional time budget for the LLM call
+            
+        Returns:
+            Structured summary text
+        """
+        arxiv_id = paper.arxiv_id or paper.filename
+        
+        cached = self.summary_cache.get(arxiv_id, self.llm.model, SUMMARY_PROMPT_VERSION)
+        if cached:
+            return cached
+        
+        prompt = f"""Summarize this research paper for a literature review.
+
+Title: {paper.title}
+Abstract: {paper.summary}
+
+Paper sections (truncated):
+{paper.section_text(SUMMARY_SECTIONS, 12000)}
+
+Write at most 250 words under these headings:
+Problem: what the paper addresses
+Method: the approach and methodology
+Results: key findings with numbers where given
+Limitations: stated or evident limitations
+
+Summary:"""
+        
+        # Map work yields to other sessions' interactive calls under rate limits
+        summary = self.llm.generate_response(
+            prompt=prompt,
+            system_message=self.system_prompt,
+            max_tokens=500,
+            priority="batch",
+            deadline_s=_remaining(deadline)
+        )
+        
+        self.summary_cache.put(arxiv_id, self.llm.model, SUMMARY_PROMPT_VERSION, summary)
+        return summary
+    
+    def map_reduce_analysis(self, query: str, papers: List[PaperRecord], max_chars: int = 24000,
+                            deadline: Deadline = None, cuts: Dict = None) -> Dict[str, str]:
+        """
+        Analyze any number of papers with bounded prompt size
+        
+        Map: summarize each paper in parallel (cached per paper).
+        Reduce: synthesize all sections from the summaries in one call.
+        
+        Under a deadline the map step gets MAP_BUDGET_SHARE of the remaining
+        time; papers whose summaries miss it are represented by their abstract.
+        
+        Args:
+            query: Research question
+            papers: List of processed papers
+            max_chars: Character budget for the combined summaries
+            deadline: Optional time budget for map and reduce
+            cuts: Collects papers whose summaries were cut (see run_full_analysis)
+            
+        Returns:
+            Dictionary keyed by SECTION_KEYS
+        """
+        if deadline is None:
+            with ThreadPoolExecutor(max_workers=self.map_workers) as executor:
+                summaries = list(executor.map(self.summarize_paper, papers))
+        else:
+            map_deadline = Deadline(deadline.remaining() * MAP_BUDGET_SHARE)
+            executor = ThreadPoolExecutor(max_workers=self.map_workers)
+            futures = [executor.submit(self.summarize_paper, paper, map_deadline) for paper in papers]
+            done, _ = wait(futures, timeout=map_deadline.remaining())
+            # Don't wait for stragglers; their results are discarded
+            executor.shutdown(wait=False, cancel_futures=True)
+            
+            summaries = []
+            for paper, future in zip(papers, futures):
+                if future in done and future.exception() is None:
+                    summaries.append(future.result())
+                else:
+                    _cut_paper(cuts, paper.arxiv_id, paper.title, "summarize", "used abstract: summary missed its budget")
+                    summaries.append(f"Abstract: {paper.summary}")
+        
+        # Share the budget evenly so no paper is dropped
+        per_paper = max(500, max_chars // max(len(papers), 1))
+        
+        context_parts = []
+        for i, (paper, summary) in enumerate(zip(papers, summaries), 1):
+            context_parts.append(f"""
+[Paper {i}]
+Title: {paper.title}
+Authors: {', '.join(paper.authors[:3])}
+Summary: {summary[:per_paper]}
+---""")
+        
+        return self.analyze_all_sections(query, papers, "\n".join(context_parts), deadline)
+    
+    def run_full_analysis(self, query: str, max_papers: int = 5, deadline_s: float = None) -> Dict:
         """
         Run complete research analysis workflow
         
+        The request runs under a deadline split into stage checkpoints
+        (STAGE_CHECKPOINTS). Papers that miss a stage budget are dropped,
+        late LLM stages are skipped, and whatever finished in time is
+        returned; with no LLM output at all the answer is a digest of the
+        abstracts. results["cut"] lists the papers and stages that were cut.
+        
+        With profiling on, each stage and each extracted paper is profiled
+        and a summary is added as results["timing"]["profile"].
+        
         Args:
             query: Research question
             max_papers: Maximum papers to analyze
+            deadline_s: Time budget in seconds (defaults to self.deadline_s;
+                0 disables the deadline)
             
         Returns:
             Dictionary with analysis results and metadata
@@ -242,49 +920,333 @@ Gap Analysis:"""
             "analysis": "",
             "methodology_comparison": "",
             "gap_analysis": "",
+            "timing": {},
+            "cut": {"stages": [], "papers": []},
             "error": None
         }
+        timing = results["timing"]
+        cuts = results["cut"]
+        start = time.perf_counter()
+        
+        deadline_s = self.deadline_s if deadline_s is None else deadline_s
+        deadline = Deadline(deadline_s) if deadline_s > 0 else None
+        gather_deadline = deadline.checkpoint(STAGE_CHECKPOINTS["gather"]) if deadline else None
+        process_deadline = deadline.checkpoint(STAGE_CHECKPOINTS["process"]) if deadline else None
+        profile = self.profiler.new_run(query) if self.profiler else None
+        waited = self._rate_limit_wait_s()
         
         try:
-            # Step 1: Decompose query
-            print("\n🧠 Decomposing research question...")
-            sub_queries = self.decompose_query(query)
+            # Steps 1-2: Decompose query while searching and downloading
+            print("\n🧠 Decomposing research question and searching for papers...")
+            with profile_stage(profile, "gather"):
+                sub_queries, papers, filepaths = self.gather_papers(query, max_papers, gather_deadline, cuts, timing)
             results["sub_queries"] = sub_queries
-            print(f"   Generated {len(sub_queries)} sub-questions")
-            
-            # Step 2: Search papers
-            print("\n🔍 Searching for papers...")
-            papers, filepaths = self.search_papers(query, max_papers)
+            timing["gather_s"] = time.perf_counter() - start
             
             if not papers:
-                results["error"] = "No papers found for query"
+                results["error"] = "No papers found for query" + (" within the time budget" if cuts["stages"] else "")
                 return results
             
             # Step 3: Process papers
             print("\n📄 Processing papers...")
-            processed_papers = self.process_papers(filepaths, papers)
+            stage_start = time.perf_counter()
+            with profile_stage(profile, "process"):
+                processed_papers = self.process_papers(filepaths, papers, process_deadline, cuts, profile)
             results["papers"] = processed_papers
+            del filepaths  # Release in-memory PDFs before the LLM stages
+            timing["process_s"] = time.perf_counter() - stage_start
             
             if not processed_papers:
-                results["error"] = "Failed to process papers"
+                if cuts["papers"]:
+                    # Every paper was cut (late or failed): answer from the abstracts we have
+                    _cut_stage(cuts, "analysis", "skipped, no paper was processed (see the cut papers)")
+                    results["analysis"] = self._abstract_digest(
+                        [(paper["title"], paper.get("summary", "")) for paper in papers])
+                else:
+                    results["error"] = "Failed to process papers"
                 return results
             
+            stage_start = time.perf_counter()
+            with profile_stage(profile, "analysis"):
+                self._analyze(query, processed_papers, results, deadline)
+            timing["analysis_s"] = time.perf_counter() - stage_start
+            print("\n✅ Analysis complete!")
+            
+        except Exception as e:
+            results["error"] = str(e)
+            print(f"\n❌ Error during analysis: {str(e)}")
+        
+        finally:
+            timing["total_s"] = time.perf_counter() - start
+            timing["rate_limit_wait_s"] = self._rate_limit_wait_s() - waited
+            if profile:
+                timing["profile"] = profile.summary()
+                print(f"📈 Profiles written to {timing['profile']['dir']}")
+        
+        return results
+    
+    def _rate_limit_wait_s(self) -> float:
+        """Seconds this agent's LLM calls have spent queued in the rate limiter"""
+        # Read without building the client, which would defeat lazy construction
+        return self._llm.get_stats()["rate_limit_wait_s"] if self._llm is not None else 0.0
+    
+    def _analyze(self, query: str, processed_papers: List[PaperRecord], results: Dict,
+                 deadline: Optional[Deadline]) -> None:
+        """Analysis stage of run_full_analysis: fills the SECTION_KEYS of `results`"""
+        cuts = results["cut"]
+        mode = self.analysis_mode
+        if mode == "auto":
+            mode = "structured" if self._fits_context(processed_papers) else "map_reduce"
+        
+        if mode == "map_reduce":
+            # Steps 4-6 over per-paper summaries
+            print(f"\n🤔 Summarizing {len(processed_papers)} papers (map-reduce)...")
+            results.update(self._within_deadline(
+                "analysis", lambda: self.map_reduce_analysis(query, processed_papers, deadline=deadline, cuts=cuts),
+                deadline, cuts) or {})
+        elif mode == "structured":
+            # Steps 4-6 in a single call
+            print("\n🤔 Analyzing papers (structured)...")
+            results.update(self._within_deadline(
+                "analysis", lambda: self.analyze_all_sections(query, processed_papers, deadline=deadline),
+                deadline, cuts) or {})
+        else:
             # Step 4: Analyze papers
             print("\n🤔 Analyzing papers...")
-            results["analysis"] = self.analyze_papers(query, processed_papers)
+            results["analysis"] = self._within_deadline(
+                "analysis", lambda: self.analyze_papers(query, processed_papers, deadline=deadline),
+                deadline, cuts) or ""
             
             # Step 5: Compare methodologies
             print("\n📊 Comparing methodologies...")
-            results["methodology_comparison"] = self.compare_methodologies(processed_papers)
+            results["methodology_comparison"] = self._within_deadline(
+                "methodology_comparison", lambda: self.compare_methodologies(processed_papers, deadline=deadline),
+                deadline, cuts) or ""
             
             # Step 6: Identify gaps
             print("\n🔬 Identifying research gaps...")
-            results["gap_analysis"] = self.identify_gaps(query, processed_papers)
+            results["gap_analysis"] = self._within_deadline(
+                "gap_analysis", lambda: self.identify_gaps(query, processed_papers, deadline=deadline),
+                deadline, cuts) or ""
+        
+        # Report sections the deadline left empty; the answer falls back to the abstracts
+        if deadline and deadline.expired():
+            reported = {cut["stage"] for cut in cuts["stages"]}
+            for key in SECTION_KEYS:
+                if not results.get(key) and key not in reported and "analysis" not in reported:
+                    _cut_stage(cuts, key, "not generated within the time budget")
+            if not results["analysis"]:
+                results["analysis"] = self._abstract_digest(
+                    [(paper.title, paper.summary) for paper in processed_papers])
+    
+    @staticmethod
+    def _within_deadline(stage: str, run, deadline: Optional[Deadline], cuts: Dict):
+        """Run an LLM stage, returning None (and recording the cut) if the deadline stops it"""
+        if deadline is None:
+            return run()
+        if deadline.expired():
+            _cut_stage(cuts, stage, "skipped, time budget exhausted")
+            return None
+        try:
+            return run()
+        except NIMError as e:
+            if not deadline.expired():
+                raise
+            _cut_stage(cuts, stage, f"cut by the time budget ({e})")
+            return None
+    
+    @staticmethod
+    def _abstract_digest(papers: List[Tuple[str, str]]) -> str:
+        """Fallback answer without the LLM: the selected papers and their abstracts"""
+        lines = ["*The time budget ran out before synthesis; these are the most relevant papers found.*", ""]
+        for i, (title, summary) in enumerate(papers, 1):
+            lines.append(f"**[Paper {i}] {title}**")
+            lines.append(summary.strip().replace("\n", " "))
+            lines.append("")
+        return "\n".join(lines).strip()
+    
+    def retrieve_passages(self, question: str, papers: List[PaperRecord],
+                          top_k: int = FOLLOW_UP_PASSAGES) -> List[Tuple[int, str, float]]:
+        """
+        Find the passages of the session's papers most relevant to a question
+        
+        Papers are split into overlapping chunks of their body (references
+        and appendices excluded) and scored with TF-IDF against the question.
+        The chunk index is built once per set of session papers and reused
+        by later follow-ups.
+        
+        Args:
+            question: Follow-up question
+            papers: Session papers
+            top_k: Passages to return
             
-            print("\n✅ Analysis complete!")
+        Returns:
+            (paper index from 1, passage, score) tuples, best first; passages
+            sharing no terms with the question are left out
+        """
+        chunks, index = self._passage_index(papers)
+        return [(chunks[j][0], chunks[j][1], round(score, 4)) for j, score in index.top(question, top_k)]
+    
+    def _passage_index(self, papers: List[PaperRecord]) -> Tuple[List[Tuple[int, str]], PassageIndex]:
+        """(paper index, chunk) list and its PassageIndex, cached until the papers change"""
+        key = tuple(paper.arxiv_id for paper in papers)
+        with self._passages_lock:
+            if self._passages is not None and self._passages[0] == key:
+                return self._passages[1:]
+        
+        chunks = []
+        for i, paper in enumerate(papers, 1):
+            text = self.store.get_text(paper.arxiv_id)
+            # Section offsets only apply to the full text; evicted papers fall back to the excerpt
+            body = text[:body_end(paper.sections, len(text))] if text is not None else paper.excerpt
+            chunks.extend((i, chunk) for chunk in self.processor.chunk_text(
+                body, chunk_size=FOLLOW_UP_CHUNK_CHARS, overlap=FOLLOW_UP_CHUNK_CHARS // 5))
+        
+        index = PassageIndex([chunk for _, chunk in chunks])
+        with self._passages_lock:
+            self._passages = (key, chunks, index)
+        return chunks, index
+    
+    def follow_up(self, question: str, results: Dict, history: List[Tuple[str, str]] = None,
+                  max_new_papers: int = 2, min_relevance: float = FOLLOW_UP_MIN_RELEVANCE) -> Dict:
+        """
+        Answer a follow-up question from the papers of an earlier analysis
+        
+        Retrieval runs over the session's extracted papers; ArXiv is searched
+        (without query decomposition) only when the best passage scores below
+        `min_relevance`, and any new papers join the session. The answer
+        takes a single LLM call.
+        
+        Args:
+            question: Follow-up question
+            results: Results of run_full_analysis; new papers are appended
+                to results["papers"]
+            history: Earlier (question, answer) turns, oldest first
+            max_new_papers: Papers to add when the session lacks coverage
+            min_relevance: Best-passage score that counts as covered
+            
+        Returns:
+            Dictionary with question, answer, sources, relevance, new_papers,
+            timing and error
+        """
+        follow_up = {
+            "question": question,
+            "answer": "",
+            "sources": [],
+            "relevance": 0.0,
+            "new_papers": [],
+            "timing": {},
+            "error": None
+        }
+        timing = follow_up["timing"]
+        start = time.perf_counter()
+        papers = results.setdefault("papers", [])
+        
+        try:
+            passages = self.retrieve_passages(question, papers)
+            follow_up["relevance"] = passages[0][2] if passages else 0.0
+            timing["retrieve_s"] = time.perf_counter() - start
+            
+            if follow_up["relevance"] < min_relevance and max_new_papers > 0:
+                print(f"\n🔍 Session papers score {follow_up['relevance']:.2f}; searching ArXiv...")
+                stage_start = time.perf_counter()
+                known_ids = {paper.arxiv_id for paper in papers}
+                
+                candidates = [paper for paper in self.find_candidates(question, max_new_papers, self.overfetch)
+                              if paper["arxiv_id"] not in known_ids]
+                ranked = deduplicate_candidates(rank_papers(question, [], candidates))
+                new_metadata, sources = self._collect_papers(ranked[:max_new_papers], {},
+                                                             spares=ranked[max_new_papers:])
+                new_papers = [paper for paper in self.process_papers(sources, new_metadata)
+                              if paper.arxiv_id not in known_ids]
+                
+                papers.extend(new_papers)
+                follow_up["new_papers"] = new_papers
+                timing["fetch_s"] = time.perf_counter() - stage_start
+                
+                if new_papers:
+                    passages = self.retrieve_passages(question, papers)
+                    follow_up["relevance"] = passages[0][2] if passages else 0.0
             
+            if not passages:
+                follow_up["error"] = "No relevant passages found in the session's papers or on ArXiv"
+                return follow_up
+            
+            follow_up["sources"] = [(index, score) for index, _, score in passages]
+            stage_start = time.perf_counter()
+            follow_up["answer"] = self._answer_follow_up(question, results, papers, passages, history or [])
+            timing["answer_s"] = time.perf_counter() - stage_start
+        
         except Exception as e:
-            results["error"] = str(e)
-            print(f"\n❌ Error during analysis: {str(e)}")
+            follow_up["error"] = str(e)
+            print(f"\n❌ Error answering follow-up: {str(e)}")
+        
+        finally:
+            timing["total_s"] = time.perf_counter() - start
+        
+        return follow_up
+    
+    def _answer_follow_up(self, question: str, results: Dict, papers: List[PaperRecord],
+                          passages: List[Tuple[int, str, float]], history: List[Tuple[str, str]]) -> str:
+        """Single LLM call answering a follow-up from retrieved passages"""
+        # Passages grouped per paper, in the session's [Paper N] numbering
+        by_paper = {}
+        for index, passage, _ in passages:
+            by_paper.setdefault(index, []).append(passage)
+        
+        context = "\n".join(
+            f"[Paper {index}] {papers[index - 1].title}\n" + "\n...\n".join(chunks) + "\n---"
+            for index, chunks in sorted(by_paper.items())
+        )
+        
+        # Enough of the conversation to resolve "it", "those methods", etc.
+        turns = [(results.get("query", ""), results.get("analysis", ""))] + list(history)[-3:]
+        conversation = "\n\n".join(f"Q: {q}\nA: {a[:800]}" for q, a in turns if q)
         
-        return results
\ No newline at end of file
+        prompt = f"""Continue this research conversation using the paper passages below.
+
+Conversation so far:
+{conversation}
+
+Relevant passages:
+{context}
+
+Follow-up question: {question}
+
+Answer concisely from the passages, citing papers as [Paper N]. Say so if the passages don't cover the question.
+
+Answer:"""
+        
+        return self.llm.generate_response(
+            prompt=prompt,
+            system_message=self.system_prompt,
+            max_tokens=800
+        )
+
+
+def _timed(timing: Dict, key: str, fn, *args):
+    """Call fn(*args), recording its duration as timing[key] even if it fails"""
+    start = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        timing[key] = time.perf_counter() - start
+
+
+def _remaining(deadline: Optional[Deadline]) -> Optional[float]:
+    """Seconds left on an optional deadline (None when unbounded)"""
+    return deadline.remaining() if deadline else None
+
+
+def _cut_paper(cuts: Optional[Dict], arxiv_id: str, title: str, stage: str, reason: str) -> None:
+    """Record a paper dropped or degraded by a stage budget"""
+    print(f"  ⏱️  {stage}: cut {arxiv_id} ({reason})")
+    if cuts is not None:
+        cuts["papers"].append({"arxiv_id": arxiv_id, "title": title, "stage": stage, "reason": reason})
+
+
+def _cut_stage(cuts: Optional[Dict], stage: str, reason: str) -> None:
+    """Record a stage skipped or cut short by its budget"""
+    print(f"  ⏱️  {stage}: {reason}")
+    if cuts is not None:
+        cuts["stages"].append({"stage": stage, "reason": reason})
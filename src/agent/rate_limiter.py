@@ -0,0 +1,208 @@
+"""
+Client-Side Rate Limiter for NVIDIA NIM
+Token buckets on requests/sec and tokens/min with a priority queue, shared by
+every NvidiaLLMClient in the process so concurrent sessions stay under the
+hosted endpoint's limits instead of hitting 429s
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Dict, Optional
+from src.utils.helpers import load_env
+
+
+# Lower value is served first
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+# A wait shorter than this is scheduling noise, not a rate limit
+LIMITED_WAIT_S = 0.01
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a request cannot be scheduled within its timeout"""
+
+
+class TokenBucket:
+    """Classic token bucket: refills at `rate` per second up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, amount: float, now: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float, now: float) -> None:
+        """Take tokens; may go negative when settling actual usage"""
+        self._refill(now)
+        self.tokens -= amount
+
+    def refund(self, amount: float, now: float) -> None:
+        """Return unused tokens"""
+        self._refill(now)
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    """Priority scheduler over request and token buckets"""
+
+    def __init__(self, requests_per_sec: float = 1.0, tokens_per_min: float = 100000,
+                 burst_requests: float = 4):
+        """
+        Args:
+            requests_per_sec: Sustained request rate
+            tokens_per_min: Sustained prompt + completion token rate
+            burst_requests: Requests that may be sent back-to-back after idle
+        """
+        self.request_bucket = TokenBucket(requests_per_sec, max(1.0, burst_requests))
+        self.token_bucket = TokenBucket(tokens_per_min / 60.0, tokens_per_min)
+
+        self._cond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+
+        self._metrics = {
+            name: {"requests": 0, "limited": 0, "wait_s": 0.0, "max_wait_s": 0.0}
+            for name in PRIORITIES
+        }
+        self._penalty_until = 0.0
+
+    def acquire(self, tokens: int, priority: str = "interactive",
+                timeout: Optional[float] = None) -> float:
+        """
+        Block until a request of `tokens` estimated tokens may be sent
+
+        Requests are served strictly in (priority, arrival) order, so an
+        interactive call never waits behind queued batch work and calls of
+        the same class are FIFO.
+
+        Args:
+            tokens: Estimated prompt + completion tokens
+            priority: Key of PRIORITIES
+            timeout: Maximum seconds to wait, None to wait indefinitely
+
+        Returns:
+            Seconds spent waiting
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"priority must be one of {tuple(PRIORITIES)}")
+
+        ticket = (PRIORITIES[priority], next(self._seq))
+        start = time.monotonic()
+
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None
+
+                    if self._queue[0] == ticket:
+                        wait = max(
+                            self._penalty_until - now,
+                            self.request_bucket.time_until(1, now),
+                            self.token_bucket.time_until(tokens, now),
+                        )
+                        if wait <= 0:
+                            self.request_bucket.consume(1, now)
+                            self.token_bucket.consume(tokens, now)
+                            break
+
+                    if timeout is not None:
+                        remaining = timeout - (now - start)
+                        if remaining <= 0:
+                            raise RateLimitTimeout(
+                                f"Could not schedule {priority} request within {timeout:.1f}s"
+                            )
+                        wait = remaining if wait is None else min(wait, remaining)
+
+                    self._cond.wait(wait)
+            finally:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+
+        waited = time.monotonic() - start
+        self._record(priority, waited)
+        return waited
+
+    def settle(self, estimated: int, actual: int) -> None:
+        """Correct the token bucket once the real usage of a call is known"""
+        with self._cond:
+            now = time.monotonic()
+            if actual < estimated:
+                self.token_bucket.refund(estimated - actual, now)
+            else:
+                self.token_bucket.consume(actual - estimated, now)
+            self._cond.notify_all()
+
+    def penalize(self, seconds: float) -> None:
+        """Pause all scheduling after the server reports a rate limit (HTTP 429)"""
+        with self._cond:
+            self._penalty_until = max(self._penalty_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def _record(self, priority: str, waited: float) -> None:
+        with self._cond:
+            metrics = self._metrics[priority]
+            metrics["requests"] += 1
+            metrics["wait_s"] += waited
+            metrics["max_wait_s"] = max(metrics["max_wait_s"], waited)
+            if waited >= LIMITED_WAIT_S:
+                metrics["limited"] += 1
+
+    def get_metrics(self) -> Dict:
+        """
+        Return wait-time metrics per priority class
+
+        `limited_fraction` is the share of requests that had to wait for the
+        buckets; compare `avg_wait_s` with the LLM client's average call
+        latency to tell limit-bound from latency-bound load.
+        """
+        with self._cond:
+            report = {"queued": len(self._queue)}
+            for name, metrics in self._metrics.items():
+                requests = metrics["requests"]
+                report[name] = {
+                    **metrics,
+                    "avg_wait_s": metrics["wait_s"] / requests if requests else 0.0,
+                    "limited_fraction": metrics["limited"] / requests if requests else 0.0,
+                }
+            return report
+
+
+_shared_limiter = None
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Return the process-wide limiter, configured from the environment:
+    NIM_REQUESTS_PER_SEC, NIM_TOKENS_PER_MIN and NIM_BURST_REQUESTS
+    """
+    global _shared_limiter
+    load_env()
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter(
+                requests_per_sec=float(os.getenv("NIM_REQUESTS_PER_SEC", "1.0")),
+                tokens_per_min=float(os.getenv("NIM_TOKENS_PER_MIN", "100000")),
+                burst_requests=float(os.getenv("NIM_BURST_REQUESTS", "4")),
+            )
+        return _shared_limiter
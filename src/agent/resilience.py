@@ -0,0 +1,306 @@
+"""
+Resilience for LLM Calls
+Deadline-bounded retries with jittered exponential backoff, hedged duplicate
+requests for tail latency, and a circuit breaker that fails fast while the
+endpoint is degraded
+"""
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+from src.utils.helpers import load_env
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the endpoint while the circuit breaker is open"""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a call cannot complete within its deadline"""
+
+
+class Deadline:
+    """Absolute time budget for one request, split into stage checkpoints"""
+
+    def __init__(self, seconds: float, start: float = None):
+        """
+        Args:
+            seconds: Total budget
+            start: monotonic() time the budget started (now by default)
+        """
+        self.seconds = seconds
+        self.start = time.monotonic() if start is None else start
+        self.expires = self.start + seconds
+
+    def remaining(self) -> float:
+        """Seconds left, never negative"""
+        return max(0.0, self.expires - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires
+
+    def checkpoint(self, fraction: float) -> "Deadline":
+        """
+        Sub-deadline ending once `fraction` of the whole budget has elapsed
+
+        Checkpoints are measured from the request start, so time an early
+        stage leaves unused carries over to the next one.
+        """
+        return Deadline(min(self.seconds, fraction * self.seconds), start=self.start)
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter"""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        """Sleep before retry number `attempt` (1-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class LatencyTracker:
+    """Sliding window of successful call latencies"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float, min_samples: int = 20) -> Optional[float]:
+        """Return the pct-th percentile, or None until enough samples exist"""
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive failures; after
+    `reset_timeout` seconds one trial call is let through (half-open) and
+    its outcome closes or re-opens the circuit
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self.rejections = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if now - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go to the endpoint now"""
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejections += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release(self) -> None:
+        """End a call whose outcome says nothing about the endpoint"""
+        # Frees a half-open trial slot without closing or re-opening the circuit
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class ResilientExecutor:
+    """Runs a call under a deadline with retries, hedging and a circuit breaker"""
+
+    def __init__(self, retry: RetryPolicy = None, breaker: CircuitBreaker = None,
+                 hedge: bool = False, hedge_percentile: float = 95.0, max_workers: int = 16):
+        """
+        Args:
+            retry: Backoff policy for retryable errors
+            breaker: Circuit breaker shared by all calls through this executor
+            hedge: Send a duplicate request once an attempt exceeds the
+                latency percentile of recent successful calls
+            hedge_percentile: Percentile that triggers a hedge
+            max_workers: Threads available for hedged attempts
+        """
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.latency = LatencyTracker()
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-hedge")
+        self._lock = threading.Lock()
+        self._metrics = {"calls": 0, "attempts": 0, "retries": 0, "hedges": 0, "hedge_wins": 0}
+
+    def call(self, fn: Callable[[float], Any], deadline_s: float,
+             is_retryable: Callable[[Exception], bool]) -> Any:
+        """
+        Call `fn(timeout)` until it succeeds, fails permanently or the deadline passes
+
+        Args:
+            fn: The request; receives the seconds it may take
+            deadline_s: Total budget across all attempts and backoff
+            is_retryable: Classifies errors; only retryable errors count
+                against the circuit breaker, and other errors leave it as it is
+
+        Returns:
+            Whatever fn returns
+        """
+        self._count("calls")
+        deadline = time.monotonic() + deadline_s
+        attempt = 0
+
+        while True:
+            # Deadline first: allow() claims the half-open trial slot, and a call
+            # that never reaches the endpoint must not keep holding it
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded(f"Deadline of {deadline_s:.1f}s exceeded")
+
+            if not self.breaker.allow():
+                raise CircuitOpenError("Circuit open: endpoint is failing, not sending request")
+
+            try:
+                self._count("attempts")
+                result = self._attempt(fn, remaining)
+                self.breaker.record_success()
+                return result
+
+            except Exception as e:
+                retryable = isinstance(e, TimeoutError) or is_retryable(e)
+                if not retryable:
+                    # Client-side or not the endpoint's fault (local rate limit, bad
+                    # request, auth): no evidence either way, so neither trip nor reset
+                    self.breaker.release()
+                    raise
+
+                self.breaker.record_failure()
+                attempt += 1
+                if attempt >= self.retry.max_attempts:
+                    raise
+
+                pause = self.retry.delay(attempt)
+                if time.monotonic() + pause >= deadline:
+                    raise DeadlineExceeded(f"Deadline of {deadline_s:.1f}s exceeded") from e
+
+                self._count("retries")
+                time.sleep(pause)
+
+    def _attempt(self, fn: Callable[[float], Any], timeout: float) -> Any:
+        """One attempt, hedged with a duplicate request if it runs past the percentile"""
+        start = time.monotonic()
+        hedge_after = self.latency.percentile(self.hedge_percentile) if self.hedge else None
+
+        if hedge_after is None or hedge_after >= timeout:
+            result = fn(timeout)
+            self.latency.record(time.monotonic() - start)
+            return result
+
+        primary = self._pool.submit(fn, timeout)
+        done, _ = wait([primary], timeout=hedge_after)
+        if done:
+            result = primary.result()
+            self.latency.record(time.monotonic() - start)
+            return result
+
+        self._count("hedges")
+        hedged = self._pool.submit(fn, max(0.0, timeout - hedge_after))
+        pending = {primary, hedged}
+        error = None
+
+        while pending:
+            remaining = timeout - (time.monotonic() - start)
+            done, pending = wait(pending, timeout=max(0.0, remaining), return_when=FIRST_COMPLETED)
+            if not done:
+                raise TimeoutError(f"Attempt exceeded {timeout:.1f}s")
+
+            for future in done:
+                if future.exception() is None:
+                    if future is hedged:
+                        self._count("hedge_wins")
+                    self.latency.record(time.monotonic() - start)
+                    return future.result()
+                error = error or future.exception()
+
+        raise error
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._metrics[name] += 1
+
+    def get_metrics(self) -> Dict:
+        """Return call, retry and hedge counters plus breaker state"""
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics["breaker_state"] = self.breaker.state
+        metrics["breaker_rejections"] = self.breaker.rejections
+        metrics["p95_latency_s"] = self.latency.percentile(95)
+        return metrics
+
+
+_shared_executor = None
+_shared_lock = threading.Lock()
+
+
+def get_resilient_executor() -> ResilientExecutor:
+    """
+    Return the process-wide executor, configured from the environment:
+    NIM_MAX_ATTEMPTS, NIM_RETRY_BASE_S, NIM_HEDGE (1/0, off by default
+    since hedges can double token spend),
+    NIM_BREAKER_FAILURES and NIM_BREAKER_RESET_S
+    """
+    global _shared_executor
+    load_env()
+    with _shared_lock:
+        if _shared_executor is None:
+            _shared_executor = ResilientExecutor(
+                retry=RetryPolicy(
+                    max_attempts=int(os.getenv("NIM_MAX_ATTEMPTS", "3")),
+                    base_delay=float(os.getenv("NIM_RETRY_BASE_S", "0.5")),
+                ),
+                breaker=CircuitBreaker(
+                    failure_threshold=int(os.getenv("NIM_BREAKER_FAILURES", "5")),
+                    reset_timeout=float(os.getenv("NIM_BREAKER_RESET_S", "30")),
+                ),
+                hedge=os.getenv("NIM_HEDGE", "0") == "1",
+            )
+        return _shared_executor
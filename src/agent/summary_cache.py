@@ -0,0 +1,73 @@
+"""
+Per-Paper Summary Cache
+Stores LLM-generated paper summaries keyed by ArXiv ID, model and prompt
+version, so map-reduce analysis never summarizes the same paper twice
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+from src.utils.helpers import ensure_dir
+
+
+class SummaryCache:
+    """SQLite-backed cache of per-paper summaries"""
+
+    def __init__(self, db_path: str = "data/processed/summaries.db"):
+        self.db_path = db_path
+        ensure_dir(os.path.dirname(db_path) or ".")
+
+        # Map workers write from several threads at once
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS summaries (
+                    arxiv_id TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    prompt_version TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (arxiv_id, model, prompt_version)
+                )
+            """)
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, arxiv_id: str, model: str, prompt_version: str) -> Optional[str]:
+        """
+        Look up a cached summary
+
+        Args:
+            arxiv_id: ArXiv ID of the paper
+            model: Model that produced the summary
+            prompt_version: Version tag of the summarization prompt
+
+        Returns:
+            Cached summary, or None on a miss
+        """
+        with self._lock:
+            row = self._conn.execute(
+                """SELECT summary FROM summaries
+                   WHERE arxiv_id = ? AND model = ? AND prompt_version = ?""",
+                (arxiv_id, model, prompt_version),
+            ).fetchone()
+
+            if row:
+                self.hits += 1
+                return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, arxiv_id: str, model: str, prompt_version: str, summary: str) -> None:
+        """Store a summary, replacing any previous entry for the same key"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT OR REPLACE INTO summaries
+                   (arxiv_id, model, prompt_version, summary, created_at)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (arxiv_id, model, prompt_version, summary, time.time()),
+            )
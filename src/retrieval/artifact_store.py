@@ -0,0 +1,405 @@
+"""
+Artifact Store
+Size-capped storage for downloaded PDFs (data/raw) and extracted text
+(data/processed). Text is compressed at rest, the least recently accessed
+files are evicted once the byte budget is exceeded, and a background task
+periodically compacts the store
+"""
+import json
+import lzma
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from src.utils.helpers import ensure_dir, load_env
+
+
+# Suffix and (compress, decompress) per codec; "none" reads legacy plain text
+CODECS = {
+    "zlib": (".txt.zz", lambda data: zlib.compress(data, 6), zlib.decompress),
+    "lzma": (".txt.xz", lzma.compress, lzma.decompress),
+    "none": (".txt", lambda data: data, lambda data: data),
+}
+
+# Section offset maps stored next to the text
+SECTIONS_SUFFIX = ".sections.json"
+
+# Only these files are managed; databases and anything else are left alone
+MANAGED_SUFFIXES = (".pdf", SECTIONS_SUFFIX) + tuple(suffix for suffix, _, _ in CODECS.values())
+
+# Evict down to this fraction of the budget so we don't evict on every write
+LOW_WATERMARK = 0.9
+
+# Leftover partial writes older than this are removed by compaction
+STALE_TMP_S = 3600
+
+
+class ArtifactStore:
+    """Byte-budgeted LRU store for PDFs and compressed text"""
+
+    def __init__(self, root: str = "data", max_bytes: int = 2 * 1024 ** 3,
+                 compression: str = "zlib"):
+        """
+        Args:
+            root: Directory holding raw/ and processed/
+            max_bytes: Budget for managed files; least recently accessed
+                files are evicted beyond it
+            compression: Codec for new text files ("zlib", "lzma" or "none")
+        """
+        if compression not in CODECS:
+            raise ValueError(f"compression must be one of {tuple(CODECS)}")
+
+        self.raw_dir = os.path.join(root, "raw")
+        self.processed_dir = os.path.join(root, "processed")
+        self.max_bytes = max_bytes
+        self.compression = compression
+        ensure_dir(self.raw_dir)
+        ensure_dir(self.processed_dir)
+
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "bytes_reclaimed": 0}
+        self._bytes_used = sum(size for _, size, _ in self._scan())
+
+        self._gc_thread = None
+        self._gc_stop = threading.Event()
+
+        # One writer keeps slow (e.g. network-attached) disk I/O off the request path
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="artifact-writer")
+
+    # ---- PDFs ----
+
+    def pdf_path(self, arxiv_id: str) -> str:
+        """Path where the PDF for a paper is stored"""
+        return os.path.join(self.raw_dir, f"{_safe_key(arxiv_id)}.pdf")
+
+    def lookup_pdf(self, arxiv_id: str) -> Optional[str]:
+        """
+        Return the stored PDF path for a paper, or None on a miss
+
+        A hit refreshes the file's access time for LRU ordering.
+        """
+        path = self.pdf_path(arxiv_id)
+        found = os.path.exists(path)
+        self._count("hits" if found else "misses")
+        if found:
+            _touch(path)
+            return path
+        return None
+
+    def add_file(self, path: str) -> None:
+        """Account for a file written into the store (e.g. a finished download)"""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+
+        _touch(path)
+        with self._lock:
+            self._bytes_used += size
+        self.enforce_budget()
+
+    def put_pdf(self, arxiv_id: str, data: bytes) -> str:
+        """
+        Write a downloaded PDF into the store
+
+        Args:
+            arxiv_id: Paper ID
+            data: PDF bytes
+
+        Returns:
+            Path of the stored file
+        """
+        path = self.pdf_path(arxiv_id)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+
+        # Replacing an earlier download must not double-count it
+        previous = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._bytes_used -= previous
+
+        self.add_file(path)
+        return path
+
+    def put_pdf_async(self, arxiv_id: str, data: bytes) -> Future:
+        """Queue put_pdf on the background writer and return its future"""
+        future = self._writer.submit(self.put_pdf, arxiv_id, data)
+        future.add_done_callback(
+            lambda f: f.exception() and print(f"  ❌ Error storing PDF {arxiv_id}: {f.exception()}")
+        )
+        return future
+
+    def flush(self) -> None:
+        """Block until every queued background write has finished"""
+        self._writer.submit(lambda: None).result()
+
+    # ---- Extracted text ----
+
+    def put_text(self, key: str, text: str) -> str:
+        """
+        Store extracted text compressed with the configured codec
+
+        Args:
+            key: Paper key, usually the ArXiv ID
+            text: Extracted text
+
+        Returns:
+            Path of the stored file
+        """
+        suffix, compress, _ = CODECS[self.compression]
+        path = os.path.join(self.processed_dir, _safe_key(key) + suffix)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+
+        with open(tmp_path, "wb") as f:
+            f.write(compress(text.encode("utf-8")))
+
+        # Replacing an older copy (any codec) must not double-count it
+        previous = self._remove_text_files(key)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._bytes_used -= previous
+
+        self.add_file(path)
+        return path
+
+    def get_text(self, key: str) -> Optional[str]:
+        """
+        Load extracted text, decompressing transparently
+
+        Args:
+            key: Paper key, usually the ArXiv ID
+
+        Returns:
+            The text, or None on a miss
+        """
+        for path, decompress in self._text_candidates(key):
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+
+            self._count("hits")
+            _touch(path)
+            return decompress(data).decode("utf-8")
+
+        self._count("misses")
+        return None
+
+    def has_text(self, key: str) -> bool:
+        """Whether text is stored for a key (does not affect stats or LRU order)"""
+        return any(os.path.exists(path) for path, _ in self._text_candidates(key))
+
+    def text_path(self, key: str) -> Optional[str]:
+        """Path of the stored text file for a key, or None"""
+        for path, _ in self._text_candidates(key):
+            if os.path.exists(path):
+                return path
+        return None
+
+    def put_sections(self, key: str, sections: Dict[str, Tuple[int, int]]) -> None:
+        """Store a paper's section -> (start, end) offset map next to its text"""
+        path = os.path.join(self.processed_dir, _safe_key(key) + SECTIONS_SUFFIX)
+        previous = os.path.getsize(path) if os.path.exists(path) else 0
+
+        with open(path, "w") as f:
+            json.dump(sections, f)
+
+        with self._lock:
+            self._bytes_used -= previous
+        self.add_file(path)
+
+    def get_sections(self, key: str) -> Optional[Dict[str, Tuple[int, int]]]:
+        """Load a paper's section offset map, or None if not stored"""
+        path = os.path.join(self.processed_dir, _safe_key(key) + SECTIONS_SUFFIX)
+        try:
+            with open(path) as f:
+                return {name: tuple(span) for name, span in json.load(f).items()}
+        except FileNotFoundError:
+            return None
+
+    def _text_candidates(self, key: str) -> List[Tuple[str, callable]]:
+        base = os.path.join(self.processed_dir, _safe_key(key))
+        return [(base + suffix, decompress) for suffix, _, decompress in CODECS.values()]
+
+    def _remove_text_files(self, key: str) -> int:
+        """Delete every stored copy of a key's text, returning the bytes freed"""
+        freed = 0
+        for path, _ in self._text_candidates(key):
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                freed += size
+            except FileNotFoundError:
+                continue
+        return freed
+
+    # ---- Eviction and compaction ----
+
+    def enforce_budget(self) -> int:
+        """
+        Evict least recently accessed files until under the low watermark
+
+        Returns:
+            Bytes reclaimed
+        """
+        with self._lock:
+            if self._bytes_used <= self.max_bytes:
+                return 0
+
+        target = int(self.max_bytes * LOW_WATERMARK)
+        reclaimed = 0
+
+        # Oldest access time first
+        for path, size, _ in sorted(self._scan(), key=lambda entry: entry[2]):
+            with self._lock:
+                if self._bytes_used <= target:
+                    break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+
+            reclaimed += size
+            with self._lock:
+                self._bytes_used -= size
+                self._stats["evictions"] += 1
+                self._stats["bytes_reclaimed"] += size
+
+        if reclaimed:
+            print(f"🧹 Evicted {reclaimed / 1024 ** 2:.1f} MB from artifact store")
+        return reclaimed
+
+    def compact(self) -> int:
+        """
+        Remove stale partial writes, compress legacy plain-text files,
+        resynchronize the size accounting and enforce the budget
+
+        Returns:
+            Bytes reclaimed
+        """
+        reclaimed = 0
+        now = time.time()
+
+        for directory in (self.raw_dir, self.processed_dir):
+            for entry in os.scandir(directory):
+                if entry.name.endswith(".tmp") and now - entry.stat().st_mtime > STALE_TMP_S:
+                    reclaimed += entry.stat().st_size
+                    os.remove(entry.path)
+
+        if self.compression != "none":
+            plain_suffix = CODECS["none"][0]
+            for entry in os.scandir(self.processed_dir):
+                if entry.name.endswith(plain_suffix):
+                    key = entry.name[:-len(plain_suffix)]
+                    stat = entry.stat()
+                    with open(entry.path, "rb") as f:
+                        text = f.read().decode("utf-8")
+                    self.put_text(key, text)
+                    new_path = self.text_path(key)
+                    reclaimed += max(0, stat.st_size - os.path.getsize(new_path))
+                    # Keep the original LRU position
+                    os.utime(new_path, (stat.st_atime, stat.st_mtime))
+
+        # Section maps are useless once their text has been evicted
+        for entry in os.scandir(self.processed_dir):
+            if entry.name.endswith(SECTIONS_SUFFIX):
+                key = entry.name[:-len(SECTIONS_SUFFIX)]
+                if not self.has_text(key):
+                    reclaimed += entry.stat().st_size
+                    os.remove(entry.path)
+
+        with self._lock:
+            self._bytes_used = sum(size for _, size, _ in self._scan())
+            self._stats["bytes_reclaimed"] += reclaimed
+
+        return reclaimed + self.enforce_budget()
+
+    def start_gc(self, interval: float = 300.0) -> None:
+        """Run compact() every `interval` seconds in a daemon thread"""
+        if self._gc_thread and self._gc_thread.is_alive():
+            return
+
+        def loop():
+            while not self._gc_stop.wait(interval):
+                try:
+                    self.compact()
+                except Exception as e:
+                    print(f"❌ Artifact store compaction failed: {str(e)}")
+
+        self._gc_stop.clear()
+        self._gc_thread = threading.Thread(target=loop, name="artifact-gc", daemon=True)
+        self._gc_thread.start()
+
+    def stop_gc(self) -> None:
+        """Stop the background compaction thread"""
+        self._gc_stop.set()
+
+    def get_stats(self) -> Dict:
+        """Return hit rate, eviction counts and space usage"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["bytes_used"] = self._bytes_used
+
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["max_bytes"] = self.max_bytes
+        return stats
+
+    def _scan(self) -> List[Tuple[str, int, float]]:
+        """List managed files as (path, size, access time)"""
+        entries = []
+        for directory in (self.raw_dir, self.processed_dir):
+            for entry in os.scandir(directory):
+                if entry.is_file() and entry.name.endswith(MANAGED_SUFFIXES):
+                    stat = entry.stat()
+                    entries.append((entry.path, stat.st_size, stat.st_atime))
+        return entries
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+
+def _safe_key(key: str) -> str:
+    """Old-style ArXiv IDs contain a slash (e.g. hep-th/9901001)"""
+    return key.replace("/", "_")
+
+
+def _touch(path: str) -> None:
+    """
+    Set the access time explicitly: relatime/noatime mounts don't update it
+    on read, and LRU eviction depends on it
+    """
+    try:
+        os.utime(path, (time.time(), os.stat(path).st_mtime))
+    except FileNotFoundError:
+        pass
+
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+    """
+    Return the process-wide store with background compaction running,
+    configured from the environment: ARTIFACT_ROOT, ARTIFACT_MAX_MB,
+    ARTIFACT_COMPRESSION and ARTIFACT_GC_INTERVAL_S
+    """
+    global _shared_store
+    load_env()
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = ArtifactStore(
+                root=os.getenv("ARTIFACT_ROOT", "data"),
+                max_bytes=int(float(os.getenv("ARTIFACT_MAX_MB", "2048")) * 1024 ** 2),
+                compression=os.getenv("ARTIFACT_COMPRESSION", "zlib"),
+            )
+            _shared_store.start_gc(float(os.getenv("ARTIFACT_GC_INTERVAL_S", "300")))
+        return _shared_store
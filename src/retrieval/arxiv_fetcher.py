@@ -2,18 +2,26 @@
 ArXiv Paper Fetcher
 Downloads research papers from ArXiv based on search queries
 """
-import arxiv
 import os
-from typing import List, Dict
-from src.utils.helpers import ensure_dir
+from typing import List, Dict, Optional
+from src.retrieval.artifact_store import ArtifactStore, get_artifact_store
+from src.retrieval.extractors import PDFSource
+
+
+# arxiv and requests are imported on first use to keep app start-up fast
+
+# Streamed download chunk size and per-request timeout
+DOWNLOAD_CHUNK_BYTES = 256 * 1024
+DOWNLOAD_TIMEOUT_S = 60
 
 
 class ArxivFetcher:
     """Fetch papers from ArXiv"""
     
-    def __init__(self, download_dir: str = "data/raw"):
-        self.download_dir = download_dir
-        ensure_dir(download_dir)
+    def __init__(self, store: ArtifactStore = None):
+        # PDFs live in the size-capped artifact store's raw/ directory
+        self.store = store or get_artifact_store()
+        self.download_dir = self.store.raw_dir
     
     def search_papers(self, query: str, max_results: int = 5) -> List[Dict]:
         """
@@ -26,6 +34,8 @@ class ArxivFetcher:
         Returns:
             List of paper metadata dictionaries
         """
+        import arxiv
+        
         print(f"🔍 Searching ArXiv for: '{query}'...")
         
         search = arxiv.Search(
@@ -63,11 +73,11 @@ class ArxivFetcher:
             Path to downloaded PDF file
         """
         arxiv_id = paper['arxiv_id']
-        filename = f"{arxiv_id.replace('/', '_')}.pdf"
-        filepath = os.path.join(self.download_dir, filename)
+        filepath = self.store.pdf_path(arxiv_id)
+        filename = os.path.basename(filepath)
         
         # Skip if already downloaded
-        if os.path.exists(filepath):
+        if self.store.lookup_pdf(arxiv_id):
             print(f"  ⏭️  Already downloaded: {filename}")
             return filepath
         
@@ -75,8 +85,10 @@ class ArxivFetcher:
             print(f"  📥 Downloading: {paper['title'][:60]}...")
             
             # Use arxiv library to download
+            import arxiv
             paper_obj = next(arxiv.Search(id_list=[arxiv_id]).results())
             paper_obj.download_pdf(dirpath=self.download_dir, filename=filename)
+            self.store.add_file(filepath)
             
             print(f"  ✅ Saved to: {filepath}")
             return filepath
@@ -85,6 +97,52 @@ class ArxivFetcher:
             print(f"  ❌ Error downloading {arxiv_id}: {str(e)}")
             return None
     
+    def fetch_pdf(self, paper: Dict, persist: bool = True) -> Optional[PDFSource]:
+        """
+        Download a paper PDF into memory, ready for extraction
+        
+        The response is streamed in chunks and joined once into an immutable
+        buffer that extractors share without copying. Storing the PDF is
+        queued on the artifact store's background writer, so disk I/O is
+        not on the critical path.
+        
+        Args:
+            paper: Paper metadata dictionary
+            persist: Also keep the PDF in the artifact store
+            
+        Returns:
+            Path of an already stored PDF, the PDF bytes, or None on failure
+        """
+        arxiv_id = paper['arxiv_id']
+        
+        stored = self.store.lookup_pdf(arxiv_id)
+        if stored:
+            print(f"  ⏭️  Already downloaded: {os.path.basename(stored)}")
+            return stored
+        
+        url = paper.get('pdf_url') or f"https://arxiv.org/pdf/{arxiv_id}"
+        try:
+            import requests
+            
+            print(f"  📥 Streaming: {paper['title'][:60]}...")
+            
+            with requests.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT_S) as response:
+                response.raise_for_status()
+                data = b"".join(response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES))
+            
+            if not data.startswith(b"%PDF"):
+                raise ValueError("response is not a PDF")
+        
+        except Exception as e:
+            print(f"  ❌ Error downloading {arxiv_id}: {str(e)}")
+            return None
+        
+        if persist:
+            self.store.put_pdf_async(arxiv_id, data)
+        
+        print(f"  ✅ Received {len(data) / 1024:.0f} KB")
+        return data
+    
     def download_papers(self, papers: List[Dict]) -> List[str]:
         """
         Download multiple papers
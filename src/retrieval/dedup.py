@@ -0,0 +1,178 @@
+"""
+Near-Duplicate Detection
+Collapses ArXiv versions of the same paper and near-identical preprints
+(e.g. workshop and full versions) using version-aware ID normalization and
+MinHash signatures with LSH banding
+"""
+import re
+import zlib
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+# numpy is imported on first use; it dominates the app's cold start otherwise
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# Prime just above 2^32, so (a * crc32 + b) stays inside uint64
+HASH_PRIME = 4294967311
+
+VERSION_PATTERN = re.compile(r"v(\d+)$")
+
+
+def normalize_arxiv_id(arxiv_id: str) -> str:
+    """
+    Strip URL prefixes and the version suffix from an ArXiv ID
+
+    "http://arxiv.org/abs/2401.01234v2" -> "2401.01234"
+    """
+    arxiv_id = arxiv_id.strip()
+    for prefix in ("http://arxiv.org/abs/", "https://arxiv.org/abs/", "arXiv:", "arxiv:"):
+        if arxiv_id.startswith(prefix):
+            arxiv_id = arxiv_id[len(prefix):]
+    return VERSION_PATTERN.sub("", arxiv_id)
+
+
+def arxiv_version(arxiv_id: str) -> int:
+    """Version number of an ArXiv ID (1 when unversioned)"""
+    match = VERSION_PATTERN.search(arxiv_id)
+    return int(match.group(1)) if match else 1
+
+
+class MinHasher:
+    """MinHash signatures over word shingles"""
+
+    def __init__(self, num_perm: int = 128, shingle_words: int = 3, seed: int = 1):
+        import numpy as np
+
+        rng = np.random.RandomState(seed)
+        # a < 2^31 keeps a * crc32 below 2^63
+        self.a = rng.randint(1, 2 ** 31, size=num_perm).astype(np.uint64)
+        self.b = rng.randint(0, 2 ** 31, size=num_perm).astype(np.uint64)
+        self.num_perm = num_perm
+        self.shingle_words = shingle_words
+
+    def signature(self, text: str) -> "np.ndarray":
+        """
+        Compute the MinHash signature of a text
+
+        Args:
+            text: Abstract or extracted text
+
+        Returns:
+            uint64 array of length num_perm
+        """
+        import numpy as np
+
+        words = re.findall(r"[a-z0-9]+", text.lower())
+        k = self.shingle_words
+        shingles = {" ".join(words[i:i + k]) for i in range(max(1, len(words) - k + 1))}
+
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles),
+                             dtype=np.uint64, count=len(shingles))
+
+        # All permutations of all shingles in one (shingles x perms) operation
+        permuted = (np.outer(hashes, self.a) + self.b) % np.uint64(HASH_PRIME)
+        return permuted.min(axis=0)
+
+
+class NearDuplicateIndex:
+    """LSH index answering "have we already kept something nearly identical?" """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, bands: int = 32):
+        """
+        Args:
+            threshold: Estimated Jaccard similarity at which texts are duplicates
+            num_perm: MinHash signature length
+            bands: LSH bands; more bands catch lower similarities as candidates
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.rows = num_perm // bands
+        self._buckets = [{} for _ in range(bands)]
+        self._signatures = {}
+
+    def _band_keys(self, signature: "np.ndarray") -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes()
+                for i in range(len(self._buckets))]
+
+    def find(self, text: str) -> Optional[str]:
+        """Return the key of an indexed near-duplicate of `text`, or None"""
+        return self._find(self.hasher.signature(text))
+
+    def _find(self, signature: "np.ndarray") -> Optional[str]:
+        candidates = set()
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(buckets.get(band_key, ()))
+
+        best_key, best_similarity = None, self.threshold
+        for key in candidates:
+            similarity = float((self._signatures[key] == signature).mean())
+            if similarity >= best_similarity:
+                best_key, best_similarity = key, similarity
+        return best_key
+
+    def add_if_new(self, key: str, text: str) -> Optional[str]:
+        """
+        Index `text` under `key` unless a near-duplicate is already indexed
+
+        Args:
+            key: Identifier of the text, usually the ArXiv ID
+            text: Text to compare
+
+        Returns:
+            Key of the existing duplicate, or None if `text` was added
+        """
+        signature = self.hasher.signature(text)
+        duplicate = self._find(signature)
+        if duplicate is not None:
+            return duplicate
+
+        self._signatures[key] = signature
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            buckets.setdefault(band_key, set()).add(key)
+        return None
+
+
+def deduplicate_candidates(papers: List[Dict], threshold: float = 0.7) -> List[Dict]:
+    """
+    Drop duplicate search hits before anything is downloaded
+
+    Versions of the same ArXiv paper collapse to the latest version, kept
+    at the position of the first one seen. Near-identical title + abstract
+    pairs collapse to the first one, so pass papers ranked best first.
+
+    Args:
+        papers: Paper metadata with "arxiv_id", "title" and "summary"
+        threshold: Estimated Jaccard similarity for near-duplicates; lower
+            than for full text since a short abstract shifts a lot per edit
+
+    Returns:
+        Canonical papers in input order
+    """
+    latest = {}
+    order = []
+    for paper in papers:
+        base_id = normalize_arxiv_id(paper["arxiv_id"])
+        if base_id not in latest:
+            order.append(base_id)
+            latest[base_id] = paper
+        elif arxiv_version(paper["arxiv_id"]) > arxiv_version(latest[base_id]["arxiv_id"]):
+            latest[base_id] = paper
+
+    index = NearDuplicateIndex(threshold=threshold)
+    kept = []
+    for base_id in order:
+        paper = latest[base_id]
+        duplicate = index.add_if_new(paper["arxiv_id"], f"{paper.get('title', '')} {paper.get('summary', '')}")
+        if duplicate:
+            print(f"  ♻️  Skipping near-duplicate {paper['arxiv_id']} of {duplicate}")
+            continue
+        kept.append(paper)
+
+    dropped = len(papers) - len(kept)
+    if dropped:
+        print(f"♻️  Removed {dropped} duplicate candidates")
+    return kept
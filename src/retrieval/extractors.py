@@ -0,0 +1,479 @@
+"""
+PDF Text Extractors
+Interchangeable text extraction backends (pypdf plain and layout modes,
+plus PyMuPDF and pypdfium2 when installed), a micro-benchmark that picks
+the fastest backend with acceptable output on the local corpus, and
+per-paper timeouts that fall back to a cheaper backend
+
+Anything that parses a PDF may hang on a pathological file, so every parse
+runs on a daemon thread that the caller can walk away from.
+"""
+import glob
+import io
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+
+# A file path or the PDF bytes themselves
+PDFSource = Union[str, bytes]
+
+# Output must reach this share of the most thorough backend's text (non-whitespace
+# characters, so layout padding doesn't count) to be acceptable
+MIN_COVERAGE = 0.85
+
+# Share of extracted characters that must be printable
+MIN_PRINTABLE = 0.95
+
+# Pages per PDF read by the selection micro-benchmark
+BENCHMARK_PAGES = 5
+
+# Pages read by the last-resort attempt once every backend has timed out
+FALLBACK_PAGES = 20
+
+
+# Process-wide "auto" choices by corpus directory, shared by every PDFProcessor
+_selection_lock = threading.Lock()
+_selections = {}
+
+
+class ExtractionTimeout(Exception):
+    """Raised when every backend in the fallback chain ran out of time"""
+    pass
+
+
+class PDFExtractor:
+    """Extraction backend interface"""
+
+    name = "base"
+
+    # Relative cost; fallbacks only ever move to a cheaper backend
+    cost = 0
+
+    @classmethod
+    def available(cls) -> bool:
+        """True if the backend's library is installed"""
+        return True
+
+    def extract(self, source: PDFSource, max_pages: Optional[int] = None) -> Tuple[str, int]:
+        """
+        Extract text from a PDF
+
+        Args:
+            source: Path to the PDF or its bytes
+            max_pages: Only read this many pages (all when None)
+
+        Returns:
+            (text, total page count)
+        """
+        raise NotImplementedError
+
+
+class PypdfExtractor(PDFExtractor):
+    """Pure-Python pypdf; "layout" keeps column and table spacing at a higher cost"""
+
+    def __init__(self, mode: str = "plain"):
+        if mode not in ("plain", "layout"):
+            raise ValueError(f"Unknown pypdf extraction mode: {mode}")
+        self.mode = mode
+        self.name = "pypdf" if mode == "plain" else "pypdf-layout"
+        self.cost = 3 if mode == "plain" else 4
+
+    def extract(self, source: PDFSource, max_pages: Optional[int] = None) -> Tuple[str, int]:
+        from pypdf import PdfReader
+
+        reader = PdfReader(io.BytesIO(source) if isinstance(source, bytes) else source)
+        pages = reader.pages if max_pages is None else reader.pages[:max_pages]
+
+        parts = []
+        for page in pages:
+            page_text = page.extract_text(extraction_mode=self.mode)
+            if page_text:
+                parts.append(page_text)
+        return "\n\n".join(parts).strip(), len(reader.pages)
+
+
+class PyMuPDFExtractor(PDFExtractor):
+    """MuPDF through PyMuPDF (optional: pip install pymupdf)"""
+
+    name = "pymupdf"
+    cost = 1
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            import fitz  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def extract(self, source: PDFSource, max_pages: Optional[int] = None) -> Tuple[str, int]:
+        import fitz
+
+        doc = fitz.open(stream=source, filetype="pdf") if isinstance(source, bytes) else fitz.open(source)
+        try:
+            count = doc.page_count
+            parts = [doc[i].get_text() for i in range(min(count, max_pages or count))]
+            return "\n\n".join(p for p in parts if p).strip(), count
+        finally:
+            doc.close()
+
+
+class PdfiumExtractor(PDFExtractor):
+    """Chromium's PDFium through pypdfium2 (optional: pip install pypdfium2)"""
+
+    name = "pdfium"
+    cost = 1
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            import pypdfium2  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def extract(self, source: PDFSource, max_pages: Optional[int] = None) -> Tuple[str, int]:
+        import pypdfium2
+
+        doc = pypdfium2.PdfDocument(source)
+        try:
+            count = len(doc)
+            parts = []
+            for i in range(min(count, max_pages or count)):
+                page = doc[i]
+                textpage = page.get_textpage()
+                parts.append(textpage.get_text_range())
+                textpage.close()
+                page.close()
+            return "\n\n".join(p for p in parts if p).strip(), count
+        finally:
+            doc.close()
+
+
+def all_extractors() -> Dict[str, PDFExtractor]:
+    """Every known backend by name, installed or not"""
+    backends = [PdfiumExtractor(), PyMuPDFExtractor(), PypdfExtractor("plain"), PypdfExtractor("layout")]
+    return {backend.name: backend for backend in backends}
+
+
+def available_extractors() -> Dict[str, PDFExtractor]:
+    """Installed backends by name, cheapest first"""
+    backends = sorted(all_extractors().values(), key=lambda b: b.cost)
+    return {backend.name: backend for backend in backends if backend.available()}
+
+
+def get_extractor(name: str) -> PDFExtractor:
+    """
+    Look up an installed backend by name
+
+    Raises:
+        ValueError: If the backend is unknown or its library is missing
+    """
+    backends = all_extractors()
+    if name not in backends:
+        raise ValueError(f"Unknown PDF extractor '{name}'; choose from {', '.join(backends)}")
+    if not backends[name].available():
+        raise ValueError(f"PDF extractor '{name}' is not installed")
+    return backends[name]
+
+
+def printable_ratio(text: str) -> float:
+    """Share of characters that are printable or whitespace"""
+    if not text:
+        return 0.0
+    return sum(ch.isprintable() or ch.isspace() for ch in text) / len(text)
+
+
+def content_chars(text: str) -> int:
+    """Characters other than whitespace"""
+    return len("".join(text.split()))
+
+
+def run_in_thread(fn: Callable[[], Any], name: str,
+                  on_done: Optional[Callable[[], None]] = None) -> Future:
+    """
+    Start fn on a daemon thread
+
+    The caller waits on the returned Future with a timeout and may abandon
+    it; the thread then finishes (or hangs) in the background.
+
+    Args:
+        fn: Work to run
+        name: Thread name
+        on_done: Called on the thread once fn returns or raises
+
+    Returns:
+        Future settled with fn's result or exception
+    """
+    future = Future()
+
+    def run() -> None:
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            if on_done:
+                on_done()
+
+    threading.Thread(target=run, name=name, daemon=True).start()
+    return future
+
+
+def benchmark_extractors(pdf_sources: Sequence[PDFSource],
+                         backends: Optional[Dict[str, PDFExtractor]] = None,
+                         max_pages: Optional[int] = BENCHMARK_PAGES,
+                         timeout: Optional[float] = None) -> List[Dict]:
+    """
+    Time each backend on the same PDFs and judge its output
+
+    A backend is acceptable when it extracts at least MIN_COVERAGE of the
+    non-whitespace characters the most thorough backend found on every PDF,
+    and its output is mostly printable (no encoding garbage). Whitespace is
+    left out so layout mode's column padding doesn't pass for thoroughness.
+    A backend that exceeds `timeout` on a PDF is unacceptable and skips the
+    remaining samples.
+
+    Args:
+        pdf_sources: Sample PDFs (paths or bytes)
+        backends: Backends to compare (all installed ones by default)
+        max_pages: Pages read per PDF
+        timeout: Seconds allowed per backend per PDF (no limit when None)
+
+    Returns:
+        One row per backend: name, seconds, chars (non-whitespace),
+        acceptable, error
+    """
+    backends = backends or available_extractors()
+    rows = []
+    lengths = {}
+
+    for name, backend in backends.items():
+        row = {"name": name, "seconds": 0.0, "chars": 0, "acceptable": True, "error": None}
+        lengths[name] = []
+
+        def extract(source: PDFSource, pages: Optional[int]) -> Tuple[str, int]:
+            future = run_in_thread(lambda: backend.extract(source, max_pages=pages),
+                                   name=f"pdf-benchmark-{name}")
+            return future.result(timeout=timeout)
+
+        timed_out = False
+        try:
+            # Untimed warm-up so lazy imports don't count against the first backend
+            extract(pdf_sources[0], 1)
+        except FutureTimeout:
+            timed_out = True
+            row["error"] = f"exceeded {timeout:g}s"
+            row["acceptable"] = False
+        except Exception:
+            pass
+        for source in pdf_sources:
+            start = time.perf_counter()
+            text = ""
+            if not timed_out:
+                try:
+                    text, _ = extract(source, max_pages)
+                except FutureTimeout:
+                    timed_out = True
+                    row["error"] = f"exceeded {timeout:g}s"
+                    row["acceptable"] = False
+                except Exception as e:
+                    row["error"] = str(e)
+                    row["acceptable"] = False
+            row["seconds"] += time.perf_counter() - start
+            row["chars"] += content_chars(text)
+            lengths[name].append(content_chars(text))
+            if printable_ratio(text) < MIN_PRINTABLE:
+                row["acceptable"] = False
+        rows.append(row)
+
+    # Coverage is judged per PDF against the best backend on that PDF
+    for i in range(len(pdf_sources)):
+        best = max(lengths[name][i] for name in lengths)
+        for row in rows:
+            if lengths[row["name"]][i] < MIN_COVERAGE * best:
+                row["acceptable"] = False
+
+    for row in rows:
+        row["seconds"] = round(row["seconds"], 4)
+    return rows
+
+
+def select_extractor(pdf_sources: Sequence[PDFSource],
+                     backends: Optional[Dict[str, PDFExtractor]] = None,
+                     timeout: Optional[float] = None) -> PDFExtractor:
+    """
+    Pick the fastest backend with acceptable output on the sample PDFs
+
+    Falls back to the cheapest installed backend when there is nothing to
+    benchmark, and to pypdf when no backend is acceptable.
+    """
+    backends = backends or available_extractors()
+    if not pdf_sources:
+        return next(iter(backends.values()))
+
+    rows = benchmark_extractors(pdf_sources, backends, timeout=timeout)
+    acceptable = [row for row in rows if row["acceptable"]]
+    if not acceptable:
+        return backends.get("pypdf", PypdfExtractor())
+
+    fastest = min(acceptable, key=lambda row: row["seconds"])
+    return backends[fastest["name"]]
+
+
+def sample_corpus(directory: str, limit: int = 3) -> List[str]:
+    """The most recently used PDFs in a directory, as benchmark samples"""
+    paths = glob.glob(os.path.join(directory, "*.pdf"))
+    paths.sort(key=os.path.getatime, reverse=True)
+    return paths[:limit]
+
+
+def auto_extractor(directory: str, timeout: Optional[float] = None) -> Optional[PDFExtractor]:
+    """
+    The backend "auto" mode picked for a corpus directory, without waiting
+
+    The first call starts the micro-benchmark on a background thread; every
+    caller in the process shares its result once it finishes.
+
+    Args:
+        directory: Directory of sample PDFs
+        timeout: Seconds allowed per backend per sample PDF
+
+    Returns:
+        The chosen backend, or None while the benchmark is still running
+    """
+    with _selection_lock:
+        if directory in _selections:
+            return _selections[directory]
+        _selections[directory] = None
+
+    def choose() -> None:
+        try:
+            choice = select_extractor(sample_corpus(directory), timeout=timeout)
+        except Exception as e:
+            print(f"⚠️  PDF extractor benchmark failed, keeping the default: {str(e)}")
+            choice = default_extractor()
+        with _selection_lock:
+            _selections[directory] = choice
+
+    threading.Thread(target=choose, name="pdf-extractor-select", daemon=True).start()
+    return None
+
+
+def default_extractor() -> PDFExtractor:
+    """pypdf when installed, else the cheapest installed backend"""
+    backends = available_extractors()
+    return backends.get("pypdf") or next(iter(backends.values()))
+
+
+class ExtractionRunner:
+    """
+    Runs extractions with a per-paper timeout, falling back to cheaper
+    backends for PDFs that take too long
+
+    If every backend in the chain times out, the cheapest backend no more
+    expensive than the preferred one gets a last attempt on the first
+    FALLBACK_PAGES pages only, which still covers the abstract, the
+    introduction and usually the method. Backends that already timed out on
+    the PDF are passed over unless nothing else is installed (pypdf alone,
+    the default install); if that attempt also times out, ExtractionTimeout
+    is raised.
+
+    A timed-out extraction cannot be interrupted. Each attempt runs on its
+    own daemon thread and gives up its slot when abandoned, so PDFs that
+    hang only cost a background thread each and never hold up later papers.
+    """
+
+    def __init__(self, extractor: PDFExtractor, timeout: float = 60.0,
+                 fallbacks: Optional[Sequence[PDFExtractor]] = None, max_workers: int = 4):
+        """
+        Args:
+            extractor: Preferred backend
+            timeout: Seconds allowed per backend per paper
+            fallbacks: Backends to try after a timeout; defaults to the
+                installed backends cheaper than `extractor`, cheapest first
+            max_workers: Extractions running at once, not counting abandoned ones
+        """
+        self.extractor = extractor
+        self.timeout = timeout
+        if fallbacks is None:
+            fallbacks = [b for b in available_extractors().values()
+                         if b.cost < extractor.cost and b.name != extractor.name]
+        self.fallbacks = list(fallbacks)
+        self.last_resorts = [b for b in available_extractors().values() if b.cost <= extractor.cost]
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._lock = threading.Lock()
+        self.stats = {"extractions": 0, "timeouts": 0, "fallbacks": 0, "abandoned": 0}
+
+    def extract(self, source: PDFSource) -> Tuple[str, int, str]:
+        """
+        Extract with the preferred backend, then each fallback on timeout
+
+        Args:
+            source: Path to the PDF or its bytes
+
+        Returns:
+            (text, page count, name of the backend that produced it; with a
+            "[first N pages]" suffix for a truncated last-resort result)
+
+        Raises:
+            ExtractionTimeout: If every backend timed out
+        """
+        chain = [self.extractor] + self.fallbacks
+        timed_out = set()
+
+        for backend in chain:
+            result = self._attempt(backend, source, None, timed_out)
+            if result:
+                return result + (backend.name,)
+
+        # Prefer a backend that hasn't hung on this PDF; with only one installed,
+        # reading fewer pages is the one cheaper option left
+        candidates = chain + self.last_resorts
+        last_resorts = [b for b in candidates if b.name not in timed_out] or candidates
+        backend = min(last_resorts, key=lambda b: b.cost)
+        result = self._attempt(backend, source, FALLBACK_PAGES, timed_out)
+        if result:
+            return result + (f"{backend.name}[first {FALLBACK_PAGES} pages]",)
+
+        raise ExtractionTimeout(f"All PDF extractors exceeded {self.timeout:g}s")
+
+    def _attempt(self, backend: PDFExtractor, source: PDFSource, max_pages: Optional[int],
+                 timed_out: set) -> Optional[Tuple[str, int]]:
+        """One extraction under the timeout; None (and the backend added to `timed_out`) if it ran over"""
+        self._slots.acquire()
+        state = {"slot": True, "abandoned": False}
+
+        def release() -> None:
+            with self._lock:
+                if state["slot"]:
+                    state["slot"] = False
+                    self._slots.release()
+
+        def done() -> None:
+            release()
+            with self._lock:
+                self.stats["abandoned"] -= state["abandoned"]
+
+        future = run_in_thread(lambda: backend.extract(source, max_pages),
+                               name=f"pdf-extract-{backend.name}", on_done=done)
+        try:
+            text, num_pages = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            with self._lock:
+                self.stats["timeouts"] += 1
+                if not future.done():
+                    state["abandoned"] = True
+                    self.stats["abandoned"] += 1
+            release()
+            timed_out.add(backend.name)
+            print(f"  ⏱️  {backend.name} exceeded {self.timeout:g}s, falling back")
+            return None
+
+        with self._lock:
+            self.stats["extractions"] += 1
+            self.stats["fallbacks"] += backend is not self.extractor or max_pages is not None
+        return text, num_pages
@@ -0,0 +1,292 @@
+"""
+Local Paper Library
+Persists fetched paper metadata in SQLite with an FTS5 full-text index over
+titles, abstracts and extracted text, so recurring topics can be answered
+without going to ArXiv. The text itself lives only in the ArtifactStore: its
+index is contentless, so library.db holds postings but no copy of the text
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+from src.utils.helpers import ensure_dir
+
+
+# Words that carry no topical signal in a research question
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "current", "do",
+    "does", "for", "from", "how", "in", "is", "it", "latest", "of", "on",
+    "or", "the", "to", "what", "which", "who", "why", "with", "different",
+    "papers", "approach", "advances", "challenges", "recent", "new",
+}
+
+
+class PaperLibrary:
+    """Persistent local store of papers with full-text search"""
+
+    def __init__(self, db_path: str = "data/library.db", min_coverage: float = 0.6):
+        """
+        Args:
+            db_path: Path to the SQLite database file
+            min_coverage: Fraction of query terms a paper must contain
+                to count as a relevant local hit
+        """
+        self.db_path = db_path
+        self.min_coverage = min_coverage
+        ensure_dir(os.path.dirname(db_path) or ".")
+
+        # Streamlit runs each session in its own thread, so share one
+        # connection and serialize access to it
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        """Create tables and the FTS5 indexes if they don't exist"""
+        with self._lock:
+            # Earlier versions stored the full text in papers_fts; drop that copy
+            columns = [row["name"] for row in self._conn.execute("PRAGMA table_info(papers_fts)")]
+            if "arxiv_id" in columns:
+                self._conn.execute("DROP TABLE papers_fts")
+                self._conn.execute("VACUUM")
+
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS papers (
+                    arxiv_id TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    authors TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    published TEXT,
+                    pdf_url TEXT,
+                    categories TEXT,
+                    filepath TEXT,
+                    pdf_metadata TEXT,
+                    added_at REAL NOT NULL
+                );
+                -- Title and abstract, read back from papers (external content)
+                CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+                    title,
+                    summary,
+                    content='papers',
+                    content_rowid='rowid'
+                );
+                CREATE TRIGGER IF NOT EXISTS papers_fts_insert AFTER INSERT ON papers BEGIN
+                    INSERT INTO papers_fts (rowid, title, summary)
+                    VALUES (new.rowid, new.title, new.summary);
+                END;
+                CREATE TRIGGER IF NOT EXISTS papers_fts_update AFTER UPDATE OF title, summary ON papers BEGIN
+                    INSERT INTO papers_fts (papers_fts, rowid, title, summary)
+                    VALUES ('delete', old.rowid, old.title, old.summary);
+                    INSERT INTO papers_fts (rowid, title, summary)
+                    VALUES (new.rowid, new.title, new.summary);
+                END;
+
+                -- Extracted text, keyed by papers.rowid; contentless, so only
+                -- postings are kept and the text stays in the ArtifactStore
+                CREATE VIRTUAL TABLE IF NOT EXISTS papers_text_fts USING fts5(
+                    text,
+                    content=''
+                );
+            """)
+            # Index existing rows after a migration (a no-op on a fresh database)
+            if self._conn.execute("SELECT COUNT(*) FROM papers_fts_docsize").fetchone()[0] == 0:
+                self._conn.execute("INSERT INTO papers_fts (papers_fts) VALUES ('rebuild')")
+
+    def add_paper(self, paper: Dict, filepath: str = None) -> None:
+        """
+        Record paper metadata (as returned by ArxivFetcher.search_papers)
+
+        Args:
+            paper: Paper metadata dictionary
+            filepath: Optional path of the downloaded PDF
+        """
+        arxiv_id = paper["arxiv_id"]
+
+        with self._lock, self._conn:
+            # An upsert keeps the rowid (and with it the text index entry) and
+            # what we already know about the paper
+            self._conn.execute(
+                """INSERT INTO papers
+                   (arxiv_id, title, authors, summary, published, pdf_url,
+                    categories, filepath, pdf_metadata, added_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL, ?)
+                   ON CONFLICT (arxiv_id) DO UPDATE SET
+                    title = excluded.title,
+                    authors = excluded.authors,
+                    summary = excluded.summary,
+                    published = excluded.published,
+                    pdf_url = excluded.pdf_url,
+                    categories = excluded.categories,
+                    filepath = COALESCE(excluded.filepath, papers.filepath),
+                    added_at = excluded.added_at""",
+                (
+                    arxiv_id,
+                    paper.get("title", ""),
+                    json.dumps(paper.get("authors", [])),
+                    paper.get("summary", ""),
+                    paper.get("published"),
+                    paper.get("pdf_url"),
+                    json.dumps(paper.get("categories", [])),
+                    filepath,
+                    time.time(),
+                ),
+            )
+
+    def add_text(self, arxiv_id: str, text: str, pdf_metadata: Dict = None) -> None:
+        """
+        Index the extracted full text of a paper already in the library
+
+        Only the postings are stored. A paper's text is indexed once;
+        re-extracting it after the store evicted it keeps the first entry,
+        since a contentless index cannot drop a row without its original text.
+
+        Args:
+            arxiv_id: ArXiv ID of the paper
+            text: Extracted text
+            pdf_metadata: Optional PDF metadata from PDFProcessor
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT rowid FROM papers WHERE arxiv_id = ?", (arxiv_id,)
+            ).fetchone()
+            if row is None:
+                return
+
+            self._conn.execute(
+                "UPDATE papers SET pdf_metadata = ? WHERE arxiv_id = ?",
+                (json.dumps(pdf_metadata or {}), arxiv_id),
+            )
+            indexed = self._conn.execute(
+                "SELECT rowid FROM papers_text_fts WHERE rowid = ?", (row["rowid"],)
+            ).fetchone()
+            if text and not indexed:
+                self._conn.execute(
+                    "INSERT INTO papers_text_fts (rowid, text) VALUES (?, ?)", (row["rowid"], text)
+                )
+
+    def search(self, query: str, max_results: int = 5) -> List[Dict]:
+        """
+        Find relevant papers in the library
+
+        A paper must contain at least min_coverage of the query terms, each
+        found in its title, abstract or indexed full text.
+
+        Args:
+            query: Research question or search string
+            max_results: Maximum number of papers to return
+
+        Returns:
+            List of paper metadata dictionaries, best match first
+        """
+        terms = query_terms(query)
+        if not terms:
+            return []
+
+        # Match any term, rank with bm25 weighting title over summary over text
+        match = " OR ".join(f'"{term}"' for term in terms)
+
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT p.rowid, p.*, lower(p.title || ' ' || p.summary) AS haystack
+                   FROM papers p
+                   LEFT JOIN (SELECT rowid, bm25(papers_fts, 10.0, 5.0) AS score
+                              FROM papers_fts WHERE papers_fts MATCH ?) m ON m.rowid = p.rowid
+                   LEFT JOIN (SELECT rowid, bm25(papers_text_fts) AS score
+                              FROM papers_text_fts WHERE papers_text_fts MATCH ?) t ON t.rowid = p.rowid
+                   WHERE m.rowid IS NOT NULL OR t.rowid IS NOT NULL
+                   ORDER BY COALESCE(m.score, 0) + COALESCE(t.score, 0)
+                   LIMIT ?""",
+                (match, match, max_results * 4),
+            ).fetchall()
+            in_text = self._text_matches(terms, [row["rowid"] for row in rows])
+
+        papers = []
+        for row in rows:
+            # bm25 happily ranks single-term matches; require real topical overlap
+            matched = sum(1 for term in terms
+                          if term in row["haystack"] or row["rowid"] in in_text[term])
+            if matched / len(terms) < self.min_coverage:
+                continue
+
+            papers.append(self._row_to_paper(row))
+            if len(papers) >= max_results:
+                break
+
+        return papers
+
+    def _text_matches(self, terms: List[str], rowids: List[int]) -> Dict[str, set]:
+        """For each term, the rowids among `rowids` whose indexed full text contains it"""
+        matches = {term: set() for term in terms}
+        if not rowids:
+            return matches
+
+        placeholders = ", ".join("?" * len(rowids))
+        for term in terms:
+            matches[term] = {row["rowid"] for row in self._conn.execute(
+                f"""SELECT rowid FROM papers_text_fts
+                    WHERE papers_text_fts MATCH ? AND rowid IN ({placeholders})""",
+                [f'"{term}"'] + rowids,
+            )}
+        return matches
+
+    def get_paper(self, arxiv_id: str) -> Optional[Dict]:
+        """Return stored metadata for a paper, or None if unknown"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM papers WHERE arxiv_id = ?", (arxiv_id,)
+            ).fetchone()
+        return self._row_to_paper(row) if row else None
+
+    def get_pdf_metadata(self, arxiv_id: str) -> Optional[Dict]:
+        """Return PDF metadata recorded when the paper was processed, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT pdf_metadata FROM papers WHERE arxiv_id = ?", (arxiv_id,)
+            ).fetchone()
+        return json.loads(row["pdf_metadata"]) if row and row["pdf_metadata"] else None
+
+    def count(self) -> int:
+        """Number of papers in the library"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _row_to_paper(row: sqlite3.Row) -> Dict:
+        """Convert a database row back to the ArxivFetcher metadata format"""
+        return {
+            "title": row["title"],
+            "authors": json.loads(row["authors"]),
+            "summary": row["summary"],
+            "published": row["published"],
+            "arxiv_id": row["arxiv_id"],
+            "pdf_url": row["pdf_url"],
+            "categories": json.loads(row["categories"] or "[]"),
+            "filepath": row["filepath"],
+        }
+
+
+def query_terms(query: str) -> List[str]:
+    """
+    Split a query into lowercase search terms, dropping stopwords
+
+    Args:
+        query: Free-text query
+
+    Returns:
+        Unique terms in query order
+    """
+    terms = []
+    for word in re.findall(r"[a-z0-9]+", query.lower()):
+        if len(word) > 2 and word not in STOPWORDS and word not in terms:
+            terms.append(word)
+    return terms
@@ -0,0 +1,89 @@
+"""
+Paper Record
+Compact per-paper result kept in session state. Only metadata and a short
+excerpt are resident; the full text stays in the ArtifactStore and is
+loaded on access
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence, Tuple
+from src.retrieval.artifact_store import ArtifactStore
+from src.retrieval.sections import detect_sections, extract_sections
+
+
+# Enough for prompt contexts and UI previews without loading the full text
+EXCERPT_CHARS = 2000
+
+
+@dataclass(slots=True)
+class PaperRecord:
+    """A processed paper: metadata, excerpt and a reference to its full text"""
+
+    arxiv_id: str
+    title: str
+    authors: Tuple[str, ...]
+    summary: str
+    published: str
+    pdf_url: str
+    filename: str
+    text_length: int
+    num_pages: Optional[int]
+    excerpt: str
+    sections: Dict[str, Tuple[int, int]]
+    store: ArtifactStore = field(repr=False, compare=False)
+
+    @property
+    def text(self) -> str:
+        """Full extracted text, read from the artifact store on every access"""
+        text = self.store.get_text(self.arxiv_id)
+
+        # Evicted since processing: the excerpt is the best we can do
+        return text if text is not None else self.excerpt
+
+    def section_text(self, names: Sequence[str], max_chars: int) -> str:
+        """
+        Text of the requested sections within a character budget
+
+        References and appendices are never included.
+
+        Args:
+            names: Canonical section names (see sections.SECTION_HEADINGS)
+            max_chars: Total character budget
+
+        Returns:
+            Selected text
+        """
+        text = self.store.get_text(self.arxiv_id)
+        if text is None:
+            # Offsets refer to the evicted full text
+            return self.excerpt[:max_chars]
+        return extract_sections(text, self.sections, names, max_chars)
+
+    @classmethod
+    def from_paper_data(cls, paper_data: Dict, store: ArtifactStore) -> "PaperRecord":
+        """
+        Build a record from PDFProcessor output
+
+        Args:
+            paper_data: Processed paper dictionary with arxiv_metadata
+            store: Store holding the paper's full text
+
+        Returns:
+            PaperRecord
+        """
+        metadata = paper_data.get("arxiv_metadata", {})
+        text = paper_data.get("text", "")
+
+        return cls(
+            arxiv_id=metadata.get("arxiv_id", ""),
+            title=metadata.get("title", "Unknown Title"),
+            authors=tuple(metadata.get("authors", ["Unknown"])),
+            summary=metadata.get("summary", ""),
+            published=metadata.get("published", "Unknown"),
+            pdf_url=metadata.get("pdf_url", ""),
+            filename=paper_data.get("filename", ""),
+            text_length=paper_data.get("text_length", 0),
+            num_pages=paper_data.get("pdf_metadata", {}).get("num_pages"),
+            excerpt=text[:EXCERPT_CHARS],
+            sections=paper_data.get("sections") or detect_sections(text),
+            store=store,
+        )
@@ -2,117 +2,216 @@
 PDF Text Processor
 Extracts and processes text from research paper PDFs
 """
+import io
 import os
-from pypdf import PdfReader
-from typing import Dict, List
-from src.utils.helpers import ensure_dir
+import threading
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Dict, List, Tuple, Union
+from src.retrieval.artifact_store import ArtifactStore, get_artifact_store
+from src.retrieval.extractors import (ExtractionRunner, PDFExtractor, PDFSource, auto_extractor,
+                                      default_extractor, get_extractor, run_in_thread)
+from src.retrieval.sections import detect_sections
+from src.utils.profiling import ProfileRun, Profiler, get_profiler, profile_stage
 
 
 class PDFProcessor:
     """Extract and process text from PDFs"""
     
-    def __init__(self, output_dir: str = "data/processed"):
-        self.output_dir = output_dir
-        ensure_dir(output_dir)
+    def __init__(self, store: ArtifactStore = None, extractor: Union[str, PDFExtractor] = None,
+                 timeout: float = None, profiler: Profiler = None):
+        """
+        Args:
+            store: Artifact store for extracted text
+            extractor: Backend instance or name ("pypdf", "pypdf-layout",
+                "pymupdf", "pdfium" or "auto" to benchmark the installed ones
+                on the local corpus in the background, using pypdf until the
+                choice is made); defaults to env PDF_EXTRACTOR or "auto"
+            timeout: Seconds per paper before falling back to a cheaper
+                backend; defaults to env PDF_EXTRACT_TIMEOUT_S or 60
+            profiler: Profiles each process_papers call per paper; defaults
+                to get_profiler() (on when PROFILE_DIR is set)
+        """
+        # Extracted text is kept compressed in the artifact store's processed/ directory
+        self.store = store or get_artifact_store()
+        self.output_dir = self.store.processed_dir
+        self.extractor = extractor or os.getenv("PDF_EXTRACTOR", "auto")
+        self.timeout = timeout or float(os.getenv("PDF_EXTRACT_TIMEOUT_S", "60"))
+        self._runner = None
+        self._runner_lock = threading.Lock()
+        self.profiler = profiler or get_profiler()
     
-    def extract_text(self, pdf_path: str) -> str:
+    @property
+    def runner(self) -> ExtractionRunner:
+        """Extraction runner, switching to the "auto" choice once it is made"""
+        with self._runner_lock:
+            if self._runner is not None and self.extractor != "auto":
+                return self._runner
+
+            if self.extractor == "auto":
+                extractor = auto_extractor(self.store.raw_dir, self.timeout) or default_extractor()
+            elif isinstance(self.extractor, str):
+                extractor = get_extractor(self.extractor)
+            else:
+                extractor = self.extractor
+
+            if self._runner is None or self._runner.extractor.name != extractor.name:
+                print(f"📑 PDF extractor: {extractor.name}")
+                self._runner = ExtractionRunner(extractor, timeout=self.timeout)
+            return self._runner
+    
+    def extract(self, pdf_path: PDFSource) -> Tuple[str, int, str]:
         """
-        Extract text from a PDF file
+        Extract text with the selected backend, falling back on timeout
         
         Args:
-            pdf_path: Path to PDF file
+            pdf_path: Path to PDF file or its bytes
             
         Returns:
-            Extracted text as string
+            (text, page count, backend name); ("", 0, "") on failure
         """
         try:
-            reader = PdfReader(pdf_path)
-            
-            text = ""
-            for page_num, page in enumerate(reader.pages, 1):
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n\n"
-            
-            return text.strip()
+            return self.runner.extract(pdf_path)
         
         except Exception as e:
-            print(f"❌ Error extracting text from {pdf_path}: {str(e)}")
-            return ""
+            print(f"❌ Error extracting text from {_describe(pdf_path)}: {str(e)}")
+            return "", 0, ""
     
-    def extract_metadata(self, pdf_path: str) -> Dict:
+    def extract_text(self, pdf_path: PDFSource) -> str:
         """
-        Extract metadata from PDF
+        Extract text from a PDF file
         
         Args:
-            pdf_path: Path to PDF file
+            pdf_path: Path to PDF file or its bytes
             
         Returns:
-            Dictionary of metadata
+            Extracted text as string
         """
-        try:
-            reader = PdfReader(pdf_path)
-            metadata = reader.metadata
+        return self.extract(pdf_path)[0]
+    
+    def extract_metadata(self, pdf_path: PDFSource) -> Dict:
+        """
+        Extract the document info metadata from a PDF
+        
+        Only the info dictionary is read, not the page tree; the page count
+        comes from the extraction. Reading runs under the per-paper timeout
+        since a PDF that hung a text extractor can hang here too.
+        
+        Args:
+            pdf_path: Path to PDF file or its bytes
+            
+        Returns:
+            Dictionary of metadata; empty on failure or timeout
+        """
+        def read() -> Dict:
+            from pypdf import PdfReader
+            
+            reader = PdfReader(io.BytesIO(pdf_path) if isinstance(pdf_path, bytes) else pdf_path)
+            metadata = reader.metadata or {}
             
             return {
                 "title": metadata.get("/Title", "Unknown"),
                 "author": metadata.get("/Author", "Unknown"),
                 "subject": metadata.get("/Subject", ""),
                 "creator": metadata.get("/Creator", ""),
-                "producer": metadata.get("/Producer", ""),
-                "num_pages": len(reader.pages)
+                "producer": metadata.get("/Producer", "")
             }
         
+        try:
+            return run_in_thread(read, name="pdf-metadata").result(timeout=self.timeout)
+        
+        except FutureTimeout:
+            print(f"  ⏱️  Metadata of {_describe(pdf_path)} exceeded {self.timeout:g}s, skipping it")
+            return {}
+        
         except Exception as e:
-            print(f"❌ Error extracting metadata from {pdf_path}: {str(e)}")
+            print(f"❌ Error extracting metadata from {_describe(pdf_path)}: {str(e)}")
             return {}
     
-    def process_paper(self, pdf_path: str, paper_metadata: Dict = None) -> Dict:
+    def process_paper(self, pdf_path: PDFSource, paper_metadata: Dict = None,
+                      profile: ProfileRun = None) -> Dict:
         """
         Process a single paper: extract text and metadata
         
+        A file is read from disk once and both passes parse the bytes in
+        memory; PDFs streamed by ArxivFetcher.fetch_pdf never touch the disk.
+        
         Args:
-            pdf_path: Path to PDF file
-            paper_metadata: Optional ArXiv metadata
+            pdf_path: Path to PDF file or its bytes
+            paper_metadata: Optional ArXiv metadata (required for bytes)
+            profile: Profile run to record this paper's memory and CPU in
             
         Returns:
             Dictionary with paper data
         """
-        filename = os.path.basename(pdf_path)
+        if paper_metadata:
+            key = paper_metadata["arxiv_id"]
+        else:
+            key = os.path.splitext(os.path.basename(pdf_path))[0] if isinstance(pdf_path, str) else "in-memory"
+        
+        with profile_stage(profile, "process", paper=key):
+            return self._process_paper(pdf_path, paper_metadata)
+    
+    def _process_paper(self, pdf_path: PDFSource, paper_metadata: Dict = None) -> Dict:
+        """process_paper without profiling"""
+        if isinstance(pdf_path, bytes):
+            if not paper_metadata:
+                raise ValueError("paper_metadata with an arxiv_id is required for in-memory PDFs")
+            filename = os.path.basename(self.store.pdf_path(paper_metadata["arxiv_id"]))
+            data, filepath = pdf_path, None
+        else:
+            filename = os.path.basename(pdf_path)
+            filepath = pdf_path
+            try:
+                with open(pdf_path, "rb") as f:
+                    data = f.read()
+            except OSError as e:
+                print(f"❌ Error reading {pdf_path}: {str(e)}")
+                return None
         print(f"📄 Processing: {filename}")
         
         # Extract text
-        text = self.extract_text(pdf_path)
+        text, num_pages, backend = self.extract(data)
         if not text:
             print(f"  ⚠️  No text extracted from {filename}")
             return None
         
         # Extract PDF metadata
-        pdf_metadata = self.extract_metadata(pdf_path)
+        pdf_metadata = self.extract_metadata(data)
+        pdf_metadata["num_pages"] = num_pages
+        
+        # Locate sections so stages can request only the parts they need
+        sections = detect_sections(text)
+        
+        # Keep the text so later runs can skip parsing
+        key = paper_metadata["arxiv_id"] if paper_metadata else os.path.splitext(filename)[0]
+        self.store.put_text(key, text)
+        self.store.put_sections(key, sections)
         
         # Combine all data
         paper_data = {
             "filename": filename,
-            "filepath": pdf_path,
+            "filepath": filepath,
             "text": text,
             "text_length": len(text),
-            "pdf_metadata": pdf_metadata
+            "sections": sections,
+            "pdf_metadata": pdf_metadata,
+            "extractor": backend
         }
         
         # Add ArXiv metadata if provided
         if paper_metadata:
             paper_data["arxiv_metadata"] = paper_metadata
         
-        print(f"  ✅ Extracted {len(text)} characters from {pdf_metadata['num_pages']} pages")
+        print(f"  ✅ Extracted {len(text)} characters from {pdf_metadata.get('num_pages', '?')} pages with {backend}")
         
         return paper_data
     
-    def process_papers(self, pdf_paths: List[str], papers_metadata: List[Dict] = None) -> List[Dict]:
+    def process_papers(self, pdf_paths: List[PDFSource], papers_metadata: List[Dict] = None) -> List[Dict]:
         """
         Process multiple papers
         
         Args:
-            pdf_paths: List of PDF file paths
+            pdf_paths: List of PDF file paths (or PDF bytes)
             papers_metadata: Optional list of ArXiv metadata
             
         Returns:
@@ -121,15 +220,18 @@ class PDFProcessor:
         print(f"\n📚 Processing {len(pdf_paths)} papers...")
         
         processed_papers = []
+        profile = self.profiler.new_run("process_papers") if self.profiler else None
         
         for i, pdf_path in enumerate(pdf_paths):
             metadata = papers_metadata[i] if papers_metadata and i < len(papers_metadata) else None
-            paper_data = self.process_paper(pdf_path, metadata)
+            paper_data = self.process_paper(pdf_path, metadata, profile)
             
             if paper_data:
                 processed_papers.append(paper_data)
         
         print(f"\n✅ Successfully processed {len(processed_papers)}/{len(pdf_paths)} papers")
+        if profile:
+            print(f"📈 Profiles written to {profile.summary()['dir']}")
         return processed_papers
     
     def chunk_text(self, text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
@@ -153,4 +255,9 @@ class PDFProcessor:
             chunks.append(chunk)
             start += (chunk_size - overlap)
         
-        return chunks
\ No newline at end of file
+        return chunks
+
+
+def _describe(pdf_path: PDFSource) -> str:
+    """Printable name for a PDF path or in-memory PDF"""
+    return f"in-memory PDF ({len(pdf_path)} bytes)" if isinstance(pdf_path, bytes) else pdf_path
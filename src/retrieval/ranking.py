@@ -0,0 +1,170 @@
+"""
+Abstract Ranking
+Scores candidate papers against the query and sub-queries with TF-IDF
+cosine similarity, vectorized over all candidates at once, so only the
+most relevant PDFs are downloaded and parsed
+"""
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from typing import TYPE_CHECKING, Dict, List, Tuple
+from src.retrieval.paper_library import STOPWORDS
+
+# numpy is imported on first use to keep it out of the app's cold start
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# Sub-queries refine the question; the original query stays the main signal
+SUB_QUERY_WEIGHT = 0.5
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords or very short words, plurals folded"""
+    tokens = []
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        if len(word) <= 2 or word in STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def tfidf_similarity(queries: List[str], documents: List[str]) -> "np.ndarray":
+    """
+    Cosine similarity between every query and every document
+
+    Args:
+        queries: Query strings
+        documents: Document strings
+
+    Returns:
+        Array of shape (len(queries), len(documents))
+    """
+    import numpy as np
+
+    doc_tokens = [tokenize(doc) for doc in documents]
+    query_tokens = [tokenize(query) for query in queries]
+
+    vocabulary = {}
+    for tokens in doc_tokens + query_tokens:
+        for token in tokens:
+            vocabulary.setdefault(token, len(vocabulary))
+
+    if not vocabulary or not documents:
+        return np.zeros((len(queries), len(documents)))
+
+    def count_matrix(token_lists: List[List[str]]) -> "np.ndarray":
+        matrix = np.zeros((len(token_lists), len(vocabulary)))
+        rows = [i for i, tokens in enumerate(token_lists) for _ in tokens]
+        cols = [vocabulary[token] for tokens in token_lists for token in tokens]
+        np.add.at(matrix, (rows, cols), 1.0)
+        return matrix
+
+    doc_counts = count_matrix(doc_tokens)
+    query_counts = count_matrix(query_tokens)
+
+    # Smoothed IDF from the candidate set; sublinear TF damps long abstracts
+    doc_freq = (doc_counts > 0).sum(axis=0)
+    idf = np.log((1 + len(documents)) / (1 + doc_freq)) + 1.0
+
+    doc_vectors = np.log1p(doc_counts) * idf
+    query_vectors = np.log1p(query_counts) * idf
+
+    doc_vectors /= np.linalg.norm(doc_vectors, axis=1, keepdims=True) + 1e-12
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True) + 1e-12
+
+    return query_vectors @ doc_vectors.T
+
+
+class PassageIndex:
+    """
+    Sparse TF-IDF index for scoring many passages against short queries
+
+    Weights match tfidf_similarity, but passages are stored as postings and
+    only the query's terms are looked up, so memory grows with the passages'
+    tokens rather than passages x vocabulary, and an index can be reused
+    across queries.
+    """
+
+    def __init__(self, passages: List[str]):
+        self.size = len(passages)
+        self._postings: Dict[str, List[Tuple[int, float]]] = {}
+        for i, passage in enumerate(passages):
+            for token, count in Counter(tokenize(passage)).items():
+                self._postings.setdefault(token, []).append((i, math.log1p(count)))
+
+        self._idf = {token: self._idf_for(len(postings)) for token, postings in self._postings.items()}
+
+        squares = [0.0] * self.size
+        for token, postings in self._postings.items():
+            idf = self._idf[token]
+            for i, tf in postings:
+                squares[i] += (tf * idf) ** 2
+        self._norms = [math.sqrt(square) + 1e-12 for square in squares]
+
+    def _idf_for(self, doc_freq: int) -> float:
+        """Smoothed IDF, as in tfidf_similarity"""
+        return math.log((1 + self.size) / (1 + doc_freq)) + 1.0
+
+    def top(self, query: str, k: int) -> List[Tuple[int, float]]:
+        """
+        Best-scoring passages for a query
+
+        Args:
+            query: Query string
+            k: Passages to return
+
+        Returns:
+            (passage index, cosine similarity) pairs, best first; passages
+            sharing no terms with the query are left out
+        """
+        weights = {token: math.log1p(count) * self._idf.get(token, self._idf_for(0))
+                   for token, count in Counter(tokenize(query)).items()}
+        query_norm = math.sqrt(sum(weight ** 2 for weight in weights.values())) + 1e-12
+
+        dots = defaultdict(float)
+        for token, weight in weights.items():
+            idf = self._idf.get(token)
+            for i, tf in self._postings.get(token, ()):
+                dots[i] += weight * tf * idf
+
+        scores = ((i, dot / (query_norm * self._norms[i])) for i, dot in dots.items())
+        # Earlier passages win ties
+        return heapq.nlargest(k, scores, key=lambda item: (item[1], -item[0]))
+
+
+def rank_papers(query: str, sub_queries: List[str], papers: List[Dict]) -> List[Dict]:
+    """
+    Order candidate papers by relevance of their title and abstract
+
+    Args:
+        query: Original research question
+        sub_queries: Sub-questions from decomposition (may be empty)
+        papers: Paper metadata with "title" and "summary"
+
+    Returns:
+        Papers sorted best first, each with a "relevance" score added
+    """
+    if not papers:
+        return []
+
+    import numpy as np
+
+    # Title counted twice: it is the densest relevance signal
+    documents = [f"{paper.get('title', '')} {paper.get('title', '')} {paper.get('summary', '')}"
+                 for paper in papers]
+    similarity = tfidf_similarity([query] + list(sub_queries), documents)
+
+    scores = similarity[0]
+    if sub_queries:
+        scores = scores + SUB_QUERY_WEIGHT * similarity[1:].mean(axis=0)
+
+    for paper, score in zip(papers, scores):
+        paper["relevance"] = round(float(score), 4)
+
+    # Stable sort keeps search-engine order among ties
+    order = np.argsort(-scores, kind="stable")
+    return [papers[i] for i in order]
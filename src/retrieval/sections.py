@@ -0,0 +1,136 @@
+"""
+Section Detection
+Finds the standard sections of a research paper in extracted text and maps
+each one to its character offsets, so prompts can include only the parts a
+stage needs and never the reference list or appendices
+"""
+import re
+from typing import Dict, List, Sequence, Tuple
+
+
+# Canonical section -> heading wordings seen in papers
+SECTION_HEADINGS = {
+    "abstract": ["abstract"],
+    "introduction": ["introduction", "motivation", "background"],
+    "related_work": ["related work", "related works", "prior work", "literature review"],
+    "methods": ["method", "methods", "methodology", "approach", "proposed method",
+                "proposed approach", "model", "our approach", "framework"],
+    "experiments": ["experiments", "experiment", "experimental setup", "evaluation",
+                    "experimental results", "setup"],
+    "results": ["results", "results and discussion", "discussion", "analysis"],
+    "conclusion": ["conclusion", "conclusions", "conclusion and future work",
+                   "limitations", "future work"],
+    "references": ["references", "bibliography"],
+    "appendix": ["appendix", "appendices", "supplementary material"],
+}
+
+# Everyday words that also head table columns and figure panels; they only
+# count as a heading when numbered ("3 Model", "IV. Analysis")
+GENERIC_HEADINGS = {"model", "analysis", "setup", "background", "discussion", "framework"}
+
+# Never sent to the LLM
+EXCLUDED_SECTIONS = ("references", "appendix")
+
+# Text before the first heading: title, authors and usually the abstract
+FRONT_MATTER = "front"
+
+# Optional top-level numbering ("3", "3.", "III.", "A") then the heading, alone on its line
+_HEADING_PATTERN = re.compile(
+    r"^[ \t]*(?:(?P<number>\d{1,2}|[IVX]{1,4}|[A-H])\.?[ \t]+)?(?P<heading>"
+    + "|".join(sorted({re.escape(h) for hs in SECTION_HEADINGS.values() for h in hs},
+                      key=len, reverse=True))
+    + r")[ \t]*:?[ \t]*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+_HEADING_TO_SECTION = {heading: name for name, headings in SECTION_HEADINGS.items()
+                       for heading in headings}
+
+
+def detect_sections(text: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Map canonical section names to (start, end) character offsets
+
+    Only the first heading of each section counts; a section runs until the
+    next detected heading. GENERIC_HEADINGS count only when numbered, so a
+    "Model" table column does not start the methods section. Once references
+    or an appendix start, later headings (e.g. "A Experiments" in the
+    supplement) are ignored.
+
+    Args:
+        text: Extracted paper text
+
+    Returns:
+        Dictionary of section name -> (start, end), in document order
+    """
+    starts: List[Tuple[int, str]] = []
+    seen = set()
+
+    for match in _HEADING_PATTERN.finditer(text):
+        heading = match.group("heading").lower()
+        name = _HEADING_TO_SECTION[heading]
+        if name in seen or (heading in GENERIC_HEADINGS and not match.group("number")):
+            continue
+
+        seen.add(name)
+        starts.append((match.start(), name))
+        if name in EXCLUDED_SECTIONS:
+            # Everything after is back matter; close it with an appendix if one follows
+            if name == "references":
+                appendix = _HEADING_PATTERN.search(text, match.end())
+                while appendix and _HEADING_TO_SECTION[appendix.group("heading").lower()] != "appendix":
+                    appendix = _HEADING_PATTERN.search(text, appendix.end())
+                if appendix:
+                    starts.append((appendix.start(), "appendix"))
+            break
+
+    sections = {}
+    if not starts or starts[0][0] > 0:
+        sections[FRONT_MATTER] = (0, starts[0][0] if starts else len(text))
+
+    for i, (start, name) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else len(text)
+        sections[name] = (start, end)
+
+    return sections
+
+
+def body_end(sections: Dict[str, Tuple[int, int]], text_length: int) -> int:
+    """Offset where references or appendices begin (text_length if neither found)"""
+    excluded = [sections[name][0] for name in EXCLUDED_SECTIONS if name in sections]
+    return min(excluded) if excluded else text_length
+
+
+def extract_sections(text: str, sections: Dict[str, Tuple[int, int]],
+                     names: Sequence[str], max_chars: int) -> str:
+    """
+    Concatenate the requested sections within a character budget
+
+    The budget is split evenly between the requested sections that exist,
+    with budget unused by short sections passed on to later ones. If none
+    exist, the start of the body (front matter onwards, without references
+    or appendices) is returned instead.
+
+    Args:
+        text: Extracted paper text
+        sections: Map from detect_sections
+        names: Canonical section names in the order to include them
+        max_chars: Total character budget
+
+    Returns:
+        Selected text
+    """
+    present = [name for name in names if name in sections and name not in EXCLUDED_SECTIONS]
+    if not present:
+        return text[:min(max_chars, body_end(sections, len(text)))]
+
+    parts = []
+    remaining = max_chars
+    for i, name in enumerate(present):
+        start, end = sections[name]
+        share = remaining // (len(present) - i)
+        part = text[start:min(end, start + share)].strip()
+        remaining -= len(part)
+        parts.append(part)
+
+    return "\n\n".join(parts)
@@ -1,8 +1,32 @@
 """
 Utility helper functions
 """
+import json
 import os
-from typing import List
+import re
+import threading
+from typing import Dict, List, Optional
+
+
+_env_loaded = False
+_env_lock = threading.Lock()
+
+
+def load_env() -> None:
+    """
+    Load .env into the environment once, on first need
+
+    python-dotenv is only imported when a .env file exists, so deployments
+    that inject the environment directly never pay for it.
+    """
+    global _env_loaded
+    with _env_lock:
+        if _env_loaded:
+            return
+        _env_loaded = True
+        if os.path.exists(".env"):
+            from dotenv import load_dotenv
+            load_dotenv()
 
 
 def ensure_dir(directory: str) -> None:
@@ -26,4 +50,39 @@ def format_citations(sources: List[str]) -> str:
     for i, source in enumerate(sources, 1):
         citations.append(f"[{i}] {source}")
     
-    return "\n".join(citations)
\ No newline at end of file
+    return "\n".join(citations)
+
+
+def extract_json_object(text: str) -> Optional[Dict]:
+    """
+    Pull the first JSON object out of an LLM response
+
+    Tolerates markdown code fences, prose before or after the object and
+    trailing commas, which small models produce regularly.
+
+    Args:
+        text: Raw model output
+
+    Returns:
+        Parsed dictionary, or None if no valid object is found
+    """
+    if not text:
+        return None
+
+    # Drop ```json fences
+    cleaned = re.sub(r"```(?:json)?", "", text)
+    # strict=False accepts raw newlines inside strings
+    decoder = json.JSONDecoder(strict=False)
+
+    for candidate in (cleaned, re.sub(r",\s*([}\]])", r"\1", cleaned)):
+        start = candidate.find("{")
+        while start != -1:
+            try:
+                obj, _ = decoder.raw_decode(candidate, start)
+                if isinstance(obj, dict):
+                    return obj
+            except json.JSONDecodeError:
+                pass
+            start = candidate.find("{", start + 1)
+
+    return None
@@ -0,0 +1,257 @@
+"""
+Pipeline Profiling
+Opt-in memory and CPU profiling per pipeline stage and per paper. Each
+stage records tracemalloc peak and delta plus sampled stacks, and writes
+them to a profile directory in standard formats: folded stacks (.folded,
+for flamegraph.pl or speedscope) and tracemalloc snapshots (.tracemalloc,
+loadable with tracemalloc.Snapshot.load)
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+
+# Sampling interval for stack samples
+DEFAULT_SAMPLE_MS = 5.0
+
+# Leaf frames that mean a thread is blocked rather than running: lock and
+# queue waits, select, and socket or TLS reads, connects and DNS lookups
+# (ArXiv and NIM requests spend most of their time there)
+_IDLE_FRAMES = {
+    ("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"), ("selectors.py", "select"), ("thread.py", "_worker"),
+    ("socket.py", "readinto"), ("socket.py", "accept"), ("socket.py", "create_connection"),
+    ("socket.py", "getaddrinfo"), ("ssl.py", "read"), ("ssl.py", "recv_into"),
+    ("ssl.py", "do_handshake"),
+}
+
+_MB = 1024 ** 2
+
+# tracemalloc is process-wide, so tracing users and the blocks whose peaks
+# are being measured are tracked across every profiler and run
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_started_tracing = False
+_active_blocks = []
+
+
+class StackSampler:
+    """Background thread sampling the stacks of all other threads"""
+
+    def __init__(self, interval_s: float):
+        self.interval_s = interval_s
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        """Stop sampling and return folded stack -> sample count"""
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                leaf = (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name)
+                if leaf in _IDLE_FRAMES:
+                    continue
+
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    if code.co_filename == __file__:
+                        # Writing another block's profile; not the pipeline's own work
+                        break
+                    names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                else:
+                    self.stacks[";".join(reversed(names))] += 1
+
+
+class ProfileRun:
+    """Profiles of one pipeline run, written to their own directory"""
+
+    def __init__(self, profiler: "Profiler", directory: str):
+        self.profiler = profiler
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._summary = {"dir": directory, "stages": {}, "papers": {}}
+
+    @contextmanager
+    def stage(self, name: str, paper: str = None) -> Iterator[None]:
+        """
+        Profile the enclosed block as a stage (or, with `paper`, one paper)
+
+        Stack samples cover every non-idle thread while the block runs, so
+        papers processed concurrently appear in each other's profiles.
+        Peaks of nested or concurrent blocks, in this run or any other, are
+        folded into every active block before tracemalloc's peak is reset,
+        so no block loses its reading.
+
+        Args:
+            name: Stage name, e.g. "gather" or "process"
+            paper: Paper key when profiling a single paper
+        """
+        label = f"paper-{paper}" if paper else name
+        record = {"peak": 0}
+
+        start_bytes = _enter_block(record)
+
+        sampler = StackSampler(self.profiler.sample_interval_s)
+        sampler.start()
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            stacks = sampler.stop()
+            snapshot = tracemalloc.take_snapshot()
+
+            current, peak = _exit_block(record)
+
+            summary = self._write(label, stacks, snapshot)
+            summary.update({
+                "seconds": round(seconds, 3),
+                "peak_mb": round(max(0, peak - start_bytes) / _MB, 2),
+                "delta_mb": round((current - start_bytes) / _MB, 2),
+            })
+            with self._lock:
+                self._summary["papers" if paper else "stages"][paper or name] = summary
+
+    def _write(self, label: str, stacks: Counter, snapshot: tracemalloc.Snapshot) -> Dict:
+        """Write a block's folded stacks and snapshot; return the sample summary"""
+        base = os.path.join(self.directory, _slug(label))
+
+        with open(f"{base}.folded", "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        snapshot.dump(f"{base}.tracemalloc")
+
+        leaves = Counter()
+        for stack, count in stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+
+        top = snapshot.statistics("lineno")[:3]
+        return {
+            "samples": sum(stacks.values()),
+            "hot_frames": [frame for frame, _ in leaves.most_common(3)],
+            "top_allocations": [f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} "
+                                f"({stat.size / _MB:.1f} MB)" for stat in top],
+        }
+
+    def summary(self) -> Dict:
+        """Per-stage and per-paper summary; also written to summary.json"""
+        with self._lock:
+            summary = json.loads(json.dumps(self._summary))
+        with open(os.path.join(self.directory, "summary.json"), "w") as f:
+            json.dump(summary, f, indent=2)
+        return summary
+
+
+class Profiler:
+    """Creates profile runs under a root directory"""
+
+    def __init__(self, root: str, sample_ms: float = DEFAULT_SAMPLE_MS):
+        """
+        Args:
+            root: Directory receiving one subdirectory per run
+            sample_ms: Stack sampling interval in milliseconds
+        """
+        self.root = root
+        self.sample_interval_s = sample_ms / 1000
+
+    def new_run(self, label: str) -> ProfileRun:
+        """Start a run in a fresh timestamped directory"""
+        directory = os.path.join(self.root, f"{time.strftime('%Y%m%d-%H%M%S')}-{_slug(label)[:40]}")
+        suffix = 1
+        candidate = directory
+        while os.path.exists(candidate):
+            suffix += 1
+            candidate = f"{directory}-{suffix}"
+        os.makedirs(candidate)
+        return ProfileRun(self, candidate)
+
+
+def _enter_block(record: Dict) -> int:
+    """Start tracing if needed and register a block; returns traced bytes at its start"""
+    global _tracing_users, _started_tracing
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        _tracing_users += 1
+
+        # Fold the running peak into blocks already active before resetting it
+        current, peak = tracemalloc.get_traced_memory()
+        for active in _active_blocks:
+            active["peak"] = max(active["peak"], peak)
+        tracemalloc.reset_peak()
+        _active_blocks.append(record)
+    return current
+
+
+def _exit_block(record: Dict) -> Tuple[int, int]:
+    """Unregister a block and stop tracing once unused; returns (current, block peak) bytes"""
+    global _tracing_users, _started_tracing
+    with _tracing_lock:
+        current, peak = tracemalloc.get_traced_memory()
+        _active_blocks.remove(record)
+        for active in _active_blocks:
+            active["peak"] = max(active["peak"], peak)
+
+        # Only stop tracing we started; callers may be tracing themselves
+        _tracing_users -= 1
+        if _tracing_users == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+    return current, max(record["peak"], peak)
+
+
+_shared_profiler = None
+_shared_lock = threading.Lock()
+
+
+def get_profiler() -> Optional[Profiler]:
+    """
+    Return the process-wide profiler configured from the environment, or None
+    when profiling is off: PROFILE_DIR enables it, PROFILE_SAMPLE_MS sets the
+    sampling interval
+    """
+    global _shared_profiler
+    root = os.getenv("PROFILE_DIR")
+    if not root:
+        return None
+    with _shared_lock:
+        if _shared_profiler is None:
+            _shared_profiler = Profiler(root, float(os.getenv("PROFILE_SAMPLE_MS", str(DEFAULT_SAMPLE_MS))))
+        return _shared_profiler
+
+
+@contextmanager
+def profile_stage(run: Optional[ProfileRun], name: str, paper: str = None) -> Iterator[None]:
+    """run.stage(name, paper), or nothing when profiling is off"""
+    if run is None:
+        yield
+    else:
+        with run.stage(name, paper):
+            yield
+
+
+def _slug(text: str) -> str:
+    """Filesystem-safe version of a label"""
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", text).strip("_") or "run"
@@ -0,0 +1,153 @@
+"""
+Test Artifact Store
+Checks byte accounting, LRU eviction, codec replacement and compaction
+against a temporary directory: no network access needed
+"""
+import os
+import tempfile
+import time
+
+from src.retrieval.artifact_store import CODECS, MANAGED_SUFFIXES, SECTIONS_SUFFIX, STALE_TMP_S, ArtifactStore
+
+
+def bytes_on_disk(store) -> int:
+    """Size of every managed file actually in the store"""
+    total = 0
+    for directory in (store.raw_dir, store.processed_dir):
+        for entry in os.scandir(directory):
+            if entry.is_file() and entry.name.endswith(MANAGED_SUFFIXES):
+                total += entry.stat().st_size
+    return total
+
+
+def set_atime(path, seconds_ago):
+    """Pin a file's LRU position"""
+    os.utime(path, (time.time() - seconds_ago, os.stat(path).st_mtime))
+
+
+def test_byte_accounting():
+    """bytes_used follows writes, overwrites and section maps"""
+    print("="*60)
+    print("TEST 1: Byte accounting")
+    print("="*60)
+
+    store = ArtifactStore(root=tempfile.mkdtemp(), max_bytes=10 ** 9)
+    store.put_pdf("2401.00001v1", b"%PDF" + os.urandom(5000))
+    store.put_text("2401.00001v1", "attention is all you need " * 200)
+    store.put_sections("2401.00001v1", {"abstract": (0, 100), "method": (100, 900)})
+    assert store.get_stats()["bytes_used"] == bytes_on_disk(store)
+
+    # Overwrites replace the old size instead of adding to it
+    store.put_pdf("2401.00001v1", b"%PDF" + os.urandom(3000))
+    store.put_text("2401.00001v1", "shorter text " * 50)
+    store.put_sections("2401.00001v1", {"abstract": (0, 50)})
+    store.put_text("hep-th/9901001", "old-style id " * 100)
+    assert store.get_stats()["bytes_used"] == bytes_on_disk(store)
+    assert store.get_text("hep-th/9901001") == "old-style id " * 100
+
+    # A fresh store over the same directory starts from the same total
+    reopened = ArtifactStore(root=os.path.dirname(store.raw_dir), max_bytes=10 ** 9)
+    assert reopened.get_stats()["bytes_used"] == bytes_on_disk(store)
+    print(f"✅ Accounted {store.get_stats()['bytes_used']} bytes, matching the disk")
+
+
+def test_lru_eviction_order():
+    """Over budget, the least recently accessed files go first, down to the low watermark"""
+    print("\n" + "="*60)
+    print("TEST 2: LRU eviction order")
+    print("="*60)
+
+    store = ArtifactStore(root=tempfile.mkdtemp(), max_bytes=10 ** 9, compression="none")
+    paths = {}
+    for i, key in enumerate(["a", "b", "c", "d"]):
+        paths[key] = store.put_pdf(key, b"x" * 1000)
+        set_atime(paths[key], 100 - i * 10)  # a oldest, d newest
+
+    # Reading "a" makes it the most recently used
+    assert store.lookup_pdf("a") == paths["a"]
+
+    # Budget for three files; the watermark (2700 bytes) leaves room for two
+    store.max_bytes = 3000
+    reclaimed = store.enforce_budget()
+
+    remaining = sorted(key for key, path in paths.items() if os.path.exists(path))
+    assert remaining == ["a", "d"], remaining
+    assert reclaimed == 2000
+    stats = store.get_stats()
+    assert stats["evictions"] == 2 and stats["bytes_used"] == bytes_on_disk(store) == 2000, stats
+
+    # Under budget nothing is evicted
+    assert store.enforce_budget() == 0
+    print(f"✅ Evicted b and c, kept {remaining}: {stats}")
+
+
+def test_codec_replacement():
+    """Rewriting text under another codec leaves one copy, readable either way"""
+    print("\n" + "="*60)
+    print("TEST 3: Codec replacement")
+    print("="*60)
+
+    root = tempfile.mkdtemp()
+    text = "graph neural networks " * 500
+    zlib_store = ArtifactStore(root=root, max_bytes=10 ** 9, compression="zlib")
+    zlib_store.put_text("2401.00002v1", text)
+
+    lzma_store = ArtifactStore(root=root, max_bytes=10 ** 9, compression="lzma")
+    assert lzma_store.get_text("2401.00002v1") == text
+    lzma_store.put_text("2401.00002v1", text)
+
+    copies = [name for name in os.listdir(lzma_store.processed_dir) if name.startswith("2401.00002v1")]
+    assert copies == ["2401.00002v1" + CODECS["lzma"][0]], copies
+    assert lzma_store.get_text("2401.00002v1") == text
+    assert lzma_store.get_stats()["bytes_used"] == bytes_on_disk(lzma_store)
+    print(f"✅ One copy left: {copies}")
+
+
+def test_compaction():
+    """Compaction compresses plain text, drops stale and orphaned files and resyncs the total"""
+    print("\n" + "="*60)
+    print("TEST 4: Compaction")
+    print("="*60)
+
+    store = ArtifactStore(root=tempfile.mkdtemp(), max_bytes=10 ** 9, compression="zlib")
+    text = "plain legacy text " * 400
+
+    # A legacy plain-text file, a stale partial write and an orphaned section map
+    legacy = os.path.join(store.processed_dir, "legacy" + CODECS["none"][0])
+    with open(legacy, "w") as f:
+        f.write(text)
+    set_atime(legacy, 500)
+    stale = os.path.join(store.raw_dir, "partial.pdf.123.tmp")
+    with open(stale, "wb") as f:
+        f.write(b"x" * 100)
+    os.utime(stale, (time.time() - STALE_TMP_S - 10, time.time() - STALE_TMP_S - 10))
+    orphan = os.path.join(store.processed_dir, "gone" + SECTIONS_SUFFIX)
+    with open(orphan, "w") as f:
+        f.write("{}")
+
+    reclaimed = store.compact()
+
+    assert not os.path.exists(legacy) and not os.path.exists(stale) and not os.path.exists(orphan)
+    compressed = store.text_path("legacy")
+    assert compressed.endswith(CODECS["zlib"][0])
+    assert abs(os.stat(compressed).st_atime - (time.time() - 500)) < 5, "LRU position lost"
+    assert store.get_text("legacy") == text
+    assert reclaimed > 0
+    assert store.get_stats()["bytes_used"] == bytes_on_disk(store)
+    print(f"✅ Reclaimed {reclaimed} bytes: {store.get_stats()}")
+
+
+def main():
+    """Run all tests"""
+    test_byte_accounting()
+    test_lru_eviction_order()
+    test_codec_replacement()
+    test_compaction()
+
+    print("\n" + "="*60)
+    print("✅ All artifact store tests passed!")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+Test LLM Client Resilience
+Runs NvidiaLLMClient against a local fault-injecting stub of the NIM
+chat completions endpoint: no API key or network access needed
+"""
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.agent.rate_limiter import RateLimiter
+from src.agent.resilience import CircuitBreaker, ResilientExecutor, RetryPolicy
+
+
+class FaultInjectingStub:
+    """Local OpenAI-compatible server that replays a script of faults"""
+
+    def __init__(self):
+        self.faults = []
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}/v1"
+
+    def script(self, *faults) -> None:
+        """Queue faults for upcoming requests: an HTTP status, ("delay", s) or "ok" """
+        with self.lock:
+            self.faults = list(faults)
+            self.requests = 0
+
+    def _next_fault(self):
+        with self.lock:
+            self.requests += 1
+            return self.faults.pop(0) if self.faults else "ok"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                fault = stub._next_fault()
+
+                if isinstance(fault, tuple) and fault[0] == "delay":
+                    time.sleep(fault[1])
+                elif isinstance(fault, int):
+                    body = json.dumps({"error": {"message": f"injected {fault}"}}).encode()
+                    self.send_response(fault)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    if fault == 429:
+                        self.send_header("Retry-After", "0")
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+
+                body = json.dumps({
+                    "id": "stub", "object": "chat.completion", "created": 0, "model": "stub",
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": "ok"}}],
+                    "usage": {"prompt_tokens": 10, "completion_tokens": 1, "total_tokens": 11},
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def make_client(stub, timeout=5.0, hedge=False, failures=5):
+    """Client pointed at the stub with fast, deterministic-enough policies"""
+    os.environ["NVIDIA_API_KEY"] = "stub-key"
+    os.environ["NIM_BASE_URL"] = stub.base_url
+    from src.agent.llm_client import NvidiaLLMClient
+
+    executor = ResilientExecutor(
+        retry=RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.05),
+        breaker=CircuitBreaker(failure_threshold=failures, reset_timeout=60),
+        hedge=hedge,
+    )
+    limiter = RateLimiter(requests_per_sec=1000, tokens_per_min=10**9, burst_requests=1000)
+    return NvidiaLLMClient(rate_limiter=limiter, executor=executor, timeout=timeout)
+
+
+def test_retry_recovers():
+    """Transient 500 and 429 responses are retried until success"""
+    print("="*60)
+    print("TEST 1: Retry on retryable errors")
+    print("="*60)
+
+    stub = FaultInjectingStub()
+    client = make_client(stub)
+    stub.script(500, 429, "ok")
+
+    assert client.generate_response("hi") == "ok"
+    assert stub.requests == 3
+    print(f"✅ Recovered after {stub.requests} requests: {client.executor.get_metrics()}")
+
+
+def test_non_retryable_fails_fast():
+    """A 400 is not retried and does not trip the breaker"""
+    print("\n" + "="*60)
+    print("TEST 2: Non-retryable errors fail immediately")
+    print("="*60)
+    from src.agent.llm_client import NIMError
+
+    stub = FaultInjectingStub()
+    client = make_client(stub)
+    stub.script(400)
+
+    try:
+        client.generate_response("hi")
+        raise AssertionError("expected NIMError")
+    except NIMError as e:
+        print(f"✅ Raised: {e}")
+
+    assert stub.requests == 1
+    assert client.executor.breaker.state == "closed"
+
+
+def test_deadline():
+    """A stuck endpoint is abandoned at the deadline instead of stalling"""
+    print("\n" + "="*60)
+    print("TEST 3: Deadline-based timeout")
+    print("="*60)
+    from src.agent.llm_client import NIMError
+
+    stub = FaultInjectingStub()
+    client = make_client(stub, timeout=2.0)
+    stub.script(("delay", 10), ("delay", 10), ("delay", 10))
+
+    start = time.monotonic()
+    try:
+        client.generate_response("hi")
+        raise AssertionError("expected NIMError")
+    except NIMError as e:
+        print(f"✅ Raised: {e}")
+
+    elapsed = time.monotonic() - start
+    assert elapsed < 5.0, f"took {elapsed:.1f}s"
+    print(f"✅ Gave up after {elapsed:.1f}s")
+
+
+def test_hedge_beats_slow_request():
+    """Once p95 is known, a slow attempt is hedged and the duplicate wins"""
+    print("\n" + "="*60)
+    print("TEST 4: Hedged request")
+    print("="*60)
+
+    stub = FaultInjectingStub()
+    client = make_client(stub, hedge=True)
+
+    # Warm up the latency window with fast calls
+    for _ in range(25):
+        client.generate_response("warm up")
+
+    stub.script(("delay", 3), "ok")
+    start = time.monotonic()
+    assert client.generate_response("hi") == "ok"
+    elapsed = time.monotonic() - start
+
+    metrics = client.executor.get_metrics()
+    assert metrics["hedge_wins"] == 1, metrics
+    assert elapsed < 2.0, f"took {elapsed:.1f}s"
+    print(f"✅ Hedge answered in {elapsed:.2f}s: {metrics}")
+
+
+def test_circuit_breaker_opens():
+    """Repeated failures open the circuit and later calls fail without a request"""
+    print("\n" + "="*60)
+    print("TEST 5: Circuit breaker")
+    print("="*60)
+    from src.agent.llm_client import NIMError
+
+    stub = FaultInjectingStub()
+    client = make_client(stub, failures=3)
+    stub.script(503, 503, 503, 503, 503, 503)
+
+    for _ in range(2):
+        try:
+            client.generate_response("hi")
+        except NIMError as e:
+            print(f"   Raised: {e}")
+
+    requests_before = stub.requests
+    start = time.monotonic()
+    try:
+        client.generate_response("hi")
+        raise AssertionError("expected NIMError")
+    except NIMError as e:
+        print(f"✅ Failed fast: {e}")
+
+    assert client.executor.breaker.state == "open"
+    assert stub.requests == requests_before
+    assert time.monotonic() - start < 0.1
+
+
+def test_non_retryable_keeps_breaker_state():
+    """Client-side and non-retryable errors neither reset nor trip the breaker"""
+    print("\n" + "="*60)
+    print("TEST 6: Breaker ignores non-retryable errors")
+    print("="*60)
+    from src.agent.llm_client import NIMError
+
+    stub = FaultInjectingStub()
+    client = make_client(stub, failures=3)
+
+    # Two 503s count; the 400 ending the call must not reset them
+    stub.script(503, 503, 400, 503)
+    for _ in range(2):
+        try:
+            client.generate_response("hi")
+        except NIMError as e:
+            print(f"   Raised: {e}")
+
+    assert client.executor.breaker.state == "open"
+    print(f"✅ Opened after 3 server errors despite the 400: {client.executor.get_metrics()}")
+
+
+def test_expired_deadline_keeps_trial_slot():
+    """A call whose deadline already passed leaves the half-open trial slot free"""
+    print("\n" + "="*60)
+    print("TEST 7: Expired deadline in half-open state")
+    print("="*60)
+    from src.agent.resilience import DeadlineExceeded
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    executor = ResilientExecutor(retry=RetryPolicy(max_attempts=1), breaker=breaker)
+    breaker.record_failure()
+    time.sleep(0.1)
+    assert breaker.state == "half_open"
+
+    try:
+        executor.call(lambda timeout: "ok", deadline_s=1e-12, is_retryable=lambda e: True)
+        raise AssertionError("expected DeadlineExceeded")
+    except DeadlineExceeded as e:
+        print(f"   Raised: {e}")
+
+    # The trial slot is still free, so the next call probes and closes the circuit
+    assert executor.call(lambda timeout: "ok", deadline_s=1.0, is_retryable=lambda e: True) == "ok"
+    assert breaker.state == "closed"
+    print(f"✅ Trial call went through after the expired call: {executor.get_metrics()}")
+
+
+def test_rate_limiter_priority_order():
+    """Queued interactive requests are served before batch ones, each class FIFO"""
+    print("\n" + "="*60)
+    print("TEST 8: Rate limiter priority and FIFO order")
+    print("="*60)
+
+    # One request per 0.2s, so the queue builds up behind the first call
+    limiter = RateLimiter(requests_per_sec=5, tokens_per_min=10**9, burst_requests=1)
+    limiter.acquire(1)
+
+    served = []
+    lock = threading.Lock()
+
+    def request(name, priority):
+        limiter.acquire(1, priority=priority)
+        with lock:
+            served.append(name)
+
+    threads = []
+    for name, priority in [("batch-1", "batch"), ("batch-2", "batch"), ("batch-3", "batch"),
+                           ("interactive-1", "interactive"), ("interactive-2", "interactive")]:
+        thread = threading.Thread(target=request, args=(name, priority))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.02)  # Fix the arrival order
+    for thread in threads:
+        thread.join()
+
+    assert served == ["interactive-1", "interactive-2", "batch-1", "batch-2", "batch-3"], served
+    metrics = limiter.get_metrics()
+    assert metrics["batch"]["requests"] == 3 and metrics["batch"]["limited"] == 3, metrics
+    assert metrics["batch"]["avg_wait_s"] > metrics["interactive"]["avg_wait_s"], metrics
+    print(f"✅ Served in order: {served}")
+
+
+def main():
+    """Run all tests"""
+    test_retry_recovers()
+    test_non_retryable_fails_fast()
+    test_deadline()
+    test_hedge_beats_slow_request()
+    test_circuit_breaker_opens()
+    test_non_retryable_keeps_breaker_state()
+    test_expired_deadline_keeps_trial_slot()
+    test_rate_limiter_priority_order()
+
+    print("\n" + "="*60)
+    print("✅ All resilience tests passed!")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
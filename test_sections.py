@@ -0,0 +1,135 @@
+"""
+Test Section Detection
+Runs detect_sections and extract_sections on synthetic paper text: no PDFs,
+API key or network access needed
+"""
+from src.retrieval.sections import FRONT_MATTER, body_end, detect_sections, extract_sections
+
+
+PAPER = """Sparse Attention at Scale
+Jane Doe, John Roe
+
+Abstract
+We study sparse attention.
+
+1 Introduction
+Transformers are expensive.
+
+2 Related Work
+Prior work prunes heads.
+
+3 Model
+Our model routes tokens.
+
+Model    Params    BLEU
+Base     60M       27.3
+Ours     61M       28.9
+
+Analysis
+This line is a figure panel title, not a heading.
+
+4 Experiments
+We train on WMT.
+
+5 Results
+Ours wins.
+
+6 Conclusion
+Sparse attention works.
+
+References
+[1] Vaswani et al. Attention is all you need.
+
+Appendix
+A Experiments
+Extra tables.
+"""
+
+
+def test_numbered_and_generic_headings():
+    """Generic words head a section only when numbered; specific headings always do"""
+    print("="*60)
+    print("TEST 1: Numbered vs. generic headings")
+    print("="*60)
+
+    sections = detect_sections(PAPER)
+    assert list(sections) == [FRONT_MATTER, "abstract", "introduction", "related_work", "methods",
+                              "experiments", "results", "conclusion", "references", "appendix"], list(sections)
+
+    # "3 Model" starts the methods; the bare "Model" table column and "Analysis"
+    # panel title stay inside it instead of opening new sections
+    start, end = sections["methods"]
+    assert PAPER[start:end].lstrip().startswith("3 Model")
+    assert "Ours     61M" in PAPER[start:end] and "figure panel" in PAPER[start:end]
+
+    # Roman and lettered numbering count too
+    numbered = detect_sections("Title\n\nII. Analysis\nWe analyse.\n\nC Discussion\nWe discuss.\n")
+    assert list(numbered) == [FRONT_MATTER, "results"], numbered
+    unnumbered = detect_sections("Title\n\nBackground\nSome context.\n\nSetup\nGPUs.\n")
+    assert list(unnumbered) == [FRONT_MATTER], unnumbered
+    print(f"✅ Sections: {list(sections)}")
+
+
+def test_back_matter_cut_off():
+    """Headings after the references are ignored and the body ends where they start"""
+    print("\n" + "="*60)
+    print("TEST 2: References and appendix cut-off")
+    print("="*60)
+
+    sections = detect_sections(PAPER)
+
+    # "A Experiments" inside the appendix does not move the experiments section
+    start, end = sections["experiments"]
+    assert PAPER[start:end].lstrip().startswith("4 Experiments")
+    assert sections["appendix"][1] == len(PAPER)
+    assert sections["references"][1] == sections["appendix"][0]
+    assert body_end(sections, len(PAPER)) == sections["references"][0]
+
+    # Excluded sections are never returned, even when asked for
+    text = extract_sections(PAPER, sections, ["conclusion", "references", "appendix"], 10000)
+    assert "Vaswani" not in text and "Extra tables" not in text
+    assert text.startswith("6 Conclusion")
+
+    # Without a single requested section, the body is returned up to the references
+    without_methods = {name: span for name, span in sections.items() if name != "methods"}
+    fallback = extract_sections(PAPER, without_methods, ["methods"], 10000)
+    assert fallback == PAPER[:sections["references"][0]]
+    print(f"✅ Body ends at offset {body_end(sections, len(PAPER))} of {len(PAPER)}")
+
+
+def test_budget_split():
+    """The budget is split evenly and what short sections leave is passed on"""
+    print("\n" + "="*60)
+    print("TEST 3: extract_sections budget split")
+    print("="*60)
+
+    text = "1 Introduction\n" + "i" * 985 + "\n2 Method\n" + "m" * 991 + "\n3 Results\n" + "r" * 20 + "\n"
+    sections = detect_sections(text)
+
+    # Two long sections share 600 characters evenly
+    even = extract_sections(text, sections, ["introduction", "methods"], 600)
+    intro, method = even.split("\n\n")
+    assert len(intro) == 300 and len(method) == 300, (len(intro), len(method))
+
+    # The short results section leaves most of its share to the method
+    split = extract_sections(text, sections, ["introduction", "results", "methods"], 900)
+    intro, results, method = split.split("\n\n")
+    assert len(intro) == 300 and results == "3 Results\n" + "r" * 20
+    assert len(method) == 900 - 300 - len(results), len(method)
+    assert len(split) <= 900 + 2 * len("\n\n")
+    print(f"✅ Shares: introduction {len(intro)}, results {len(results)}, methods {len(method)}")
+
+
+def main():
+    """Run all tests"""
+    test_numbered_and_generic_headings()
+    test_back_matter_cut_off()
+    test_budget_split()
+
+    print("\n" + "="*60)
+    print("✅ All section detection tests passed!")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()